@@ -44,3 +44,46 @@ pub async fn verify_report(reportresp: Json<ReportResponse>, measurement: String
         },
     }
 }
+
+#[derive(Serialize, Deserialize)]
+pub struct BatchVerdict {
+    pub miner_ip: String,
+    pub verified: bool,
+    pub error: Option<String>,
+}
+
+/// Batch verify endpoint, returns one verdict per report in request order.
+/// Reports are parsed one by one so a malformed report only fails its own verdict.
+pub async fn verify_report_batch(reports: Json<Vec<serde_json::Value>>, measurement: String) -> Json<Vec<BatchVerdict>> {
+    let Json(reports) = reports;
+    let mut verdicts: Vec<Option<BatchVerdict>> = Vec::with_capacity(reports.len());
+    let mut miner_ips = Vec::with_capacity(reports.len());
+    let mut batch = Vec::with_capacity(reports.len());
+    for value in reports {
+        let miner_ip = value.get("miner_ip").and_then(|ip| ip.as_str()).unwrap_or_default().to_string();
+        match serde_json::from_value::<ReportResponse>(value) {
+            Ok(reportresp) => {
+                miner_ips.push(reportresp.miner_ip.clone());
+                batch.push((reportresp.report, reportresp.cert, reportresp.miner_ip));
+                verdicts.push(None);
+            },
+            Err(e) => {
+                verdicts.push(Some(BatchVerdict {
+                    miner_ip,
+                    verified: false,
+                    error: Some(format!("Invalid report: {}", e)),
+                }));
+            },
+        }
+    }
+    let mut results = miner_ips.into_iter().zip(verify::cmd_batch(batch, measurement, true).await);
+    let verdicts = verdicts.into_iter().map(|verdict| verdict.unwrap_or_else(|| {
+        let (miner_ip, result) = results.next().expect("one result per parsed report");
+        BatchVerdict {
+            miner_ip,
+            verified: result.is_ok(),
+            error: result.err().map(|e| e.to_string()),
+        }
+    })).collect();
+    axum::Json(verdicts)
+}
@@ -162,9 +162,19 @@ pub mod cert_authority {
 
 pub mod vcek {
     use reqwest::StatusCode;
+    use std::{collections::HashMap, sync::{Mutex, OnceLock}};
 
     use super::*;
 
+    // VCEKs kept before the cache starts over, one per chip and TCB version
+    const VCEK_CACHE_SIZE: usize = 4096;
+
+    // VCEKs in DER format by KDS URL: a chip at a given TCB always gets the same VCEK
+    fn vcek_cache() -> &'static Mutex<HashMap<String, Vec<u8>>> {
+        static CACHE: OnceLock<Mutex<HashMap<String, Vec<u8>>>> = OnceLock::new();
+        CACHE.get_or_init(|| Mutex::new(HashMap::new()))
+    }
+
     #[derive(Parser)]
     pub struct Args {
         /// Specify encoding to use for certificates.
@@ -206,13 +216,23 @@ pub mod vcek {
             att_report.reported_tcb.microcode
         );
 
+        let cached = vcek_cache().lock().unwrap().get(&vcek_url).cloned();
+        if let Some(vcek) = cached {
+            return Ok(vcek);
+        }
+
         // VCEK in DER format
-        let vcek_rsp = reqwest::get(vcek_url).await?; //.context("Unable to send request for VCEK")?;
+        let vcek_rsp = reqwest::get(vcek_url.as_str()).await?; //.context("Unable to send request for VCEK")?;
 
         match vcek_rsp.status() {
             StatusCode::OK => {
                 let vcek_rsp_bytes: Vec<u8> =
                     vcek_rsp.bytes().await?.to_vec();
+                let mut cache = vcek_cache().lock().unwrap();
+                if cache.len() >= VCEK_CACHE_SIZE {
+                    cache.clear();
+                }
+                cache.insert(vcek_url, vcek_rsp_bytes.clone());
                 Ok(vcek_rsp_bytes)
             }
             status => Err(anyhow::anyhow!("Unable to fetch VCEK from URL: {status:?}")),
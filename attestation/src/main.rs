@@ -14,7 +14,7 @@ use axum::{
 };
 use serde_json;
 use tokio;
-use api::{verify_report,root,ReportResponse};
+use api::{verify_report,verify_report_batch,root,ReportResponse};
 
 
 
@@ -25,8 +25,11 @@ async fn main() -> Result<(),anyhow::Error> {
     //Double str conversion because .to_string is not supported natively by serde_json and causes an inclusion of the json quotes in the string
     let measurement: String = measurement_json.get("measurement").expect("Missing measurement").as_str().expect("failed to parse measurement").to_string();
 
+    let batch_measurement = measurement.clone();
+
     let app = Router::new().route("/check", get(root)).route("/report", post(move |body: Json<ReportResponse>|{
-        verify_report(body, measurement)})).with_state(());
+        verify_report(body, measurement)})).route("/report/batch", post(move |body: Json<Vec<serde_json::Value>>|{
+        verify_report_batch(body, batch_measurement)})).with_state(());
     
     let listener = tokio::net::TcpListener::bind("0.0.0.0:8080").await.unwrap();
     println!("Starting http server at : 0.0.0.0:8080");
@@ -10,6 +10,7 @@ use std::{
     path::{Path, PathBuf},
 };
 use std::fs::OpenOptions;
+use std::io::Write;
 use openssl::{ecdsa::EcdsaSig, sha::Sha384};
 use sev::certs::snp::{ca};
 use sha2::{Digest, Sha256};
@@ -22,13 +23,54 @@ struct Miner {
 }
 
 pub async fn cmd(att_report_path: AttestationReport, certificate:Vec<u8>, miner_ip:String, measurement: String, quiet: bool) -> Result<()> {
-    let vek = match attestation::validate_cc(Path::new("./milan_certs"), ProcType::Milan, att_report_path.clone(), quiet).await {
-        Ok(vek) => Ok(vek),
-        Err(_error) => match attestation::validate_cc(Path::new("./genoa_certs"), ProcType::Genoa, att_report_path.clone(), quiet).await {
-            Ok(vek) => Ok(vek),
-            Err(error) => Err(error),
+    cmd_with_preference(att_report_path, certificate, miner_ip, &measurement, ProcType::Milan, quiet).await?;
+    Ok(())
+}
+
+// Reports of one batch verified at the same time, each one may wait on KDS round trips
+const BATCH_CONCURRENCY: usize = 8;
+
+/// Verifies a batch of reports, up to BATCH_CONCURRENCY at a time, and returns their results in order.
+/// Each report first tries the processor generation that verified the latest one, so a batch from
+/// one generation skips the failed chain validation (and KDS round trip) against the other generation.
+pub async fn cmd_batch(reports: Vec<(AttestationReport, Vec<u8>, String)>, measurement: String, quiet: bool) -> Vec<Result<()>> {
+    let preferred = std::sync::Mutex::new(ProcType::Milan);
+    let permits = tokio::sync::Semaphore::new(BATCH_CONCURRENCY);
+    let checks = reports.into_iter().map(|(att_report, certificate, miner_ip)| {
+        let (preferred, permits, measurement) = (&preferred, &permits, &measurement);
+        async move {
+            let _permit = permits.acquire().await.expect("batch semaphore is never closed");
+            let first = preferred.lock().unwrap().clone();
+            let result = cmd_with_preference(att_report, certificate, miner_ip, measurement, first, quiet).await;
+            if let Ok(proc_type) = &result {
+                *preferred.lock().unwrap() = proc_type.clone();
+            }
+            result.map(|_| ())
         }
-    }?;
+    });
+    futures_util::future::join_all(checks).await
+}
+
+fn certs_dir(proc_type: &ProcType) -> &'static Path {
+    match proc_type {
+        ProcType::Genoa => Path::new("./genoa_certs"),
+        _ => Path::new("./milan_certs"),
+    }
+}
+
+/// Verifies a report trying the `preferred` processor generation first and returns the generation that verified it
+pub async fn cmd_with_preference(att_report_path: AttestationReport, certificate:Vec<u8>, miner_ip:String, measurement: &str, preferred: ProcType, quiet: bool) -> Result<ProcType> {
+    let (first, second) = match preferred {
+        ProcType::Genoa => (ProcType::Genoa, ProcType::Milan),
+        _ => (ProcType::Milan, ProcType::Genoa),
+    };
+    let (vek, proc_type) = match attestation::validate_cc(certs_dir(&first), first.clone(), att_report_path.clone(), quiet).await {
+        Ok(vek) => (vek, first),
+        Err(_error) => {
+            let vek = attestation::validate_cc(certs_dir(&second), second.clone(), att_report_path.clone(), quiet).await?;
+            (vek, second)
+        }
+    };
     
     attestation::verify_attestation(att_report_path.clone(), vek, Path::new("."), quiet)?;
 
@@ -40,9 +82,12 @@ pub async fn cmd(att_report_path: AttestationReport, certificate:Vec<u8>, miner_
         if cert_hash == att_report_path.report_data {
             let row = Miner{cert: std::str::from_utf8(&certificate)?.to_string(), ip: miner_ip};
 
-            let db_file = OpenOptions::new().create(true).append(true).open("db.json")?;
-            serde_json::to_writer(db_file, &row)?;
-            return Ok(())
+            // One write per row, so rows appended by concurrent verifications never interleave
+            let mut line = serde_json::to_vec(&row)?;
+            line.push(b'\n');
+            let mut db_file = OpenOptions::new().create(true).append(true).open("db.json")?;
+            db_file.write_all(&line)?;
+            return Ok(proc_type)
         }  
     }
     Err(anyhow::anyhow!("Failed to verify attestation report"))
@@ -0,0 +1,410 @@
+"""End-to-end benchmark of a validation cycle against local stand-ins for miners, verifier and chain.
+
+Every fake node gets its own loopback address (127.0.1.0 upwards, Linux only) and serves /report
+over HTTP and /fetch_token_usage/ over TLS, with configurable latency and failure rates. A stub
+verifier accepts every report and appends the node certificate to its db.json like the real one.
+A fake dendrite answers GetNodeDetail from the same node table and a stub subtensor serves the
+metagraph and accepts set_weights. The stand-ins run in their own process so the reported time and
+peak RSS are the validator's alone. Each node count runs in a fresh process with an empty database.
+With --shards, peak RSS and DB writes are the coordinator's, the shard workers are not counted.
+
+Run from the repository root (needs the validator's requirements installed):
+
+    python benchmarks/bench_cycle.py --nodes 10 100 1000 5000
+"""
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import json
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import socket
+import ssl
+import sys
+import tempfile
+import time
+import types
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+USAGE_APIS = ('openai', 'groq', 'claude', 'gemini')
+
+
+def node_address(index):
+    """Loopback address of the index-th fake node."""
+    index += 256
+    return f"127.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+
+def miner_hotkey(uid):
+    return f"5FakeMinerHotkey{uid:08d}"
+
+
+def node_table(nodes, nodes_per_miner):
+    """Returns {uid: [(ip, hotkey)]} for nodes spread nodes_per_miner per miner."""
+    table = {}
+    for index in range(nodes):
+        uid = index // nodes_per_miner
+        table.setdefault(uid, []).append((node_address(index), miner_hotkey(uid)))
+    return table
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def write_certificate(directory):
+    """Writes a self-signed certificate and key shared by all fake nodes. Returns (cert_path, key_path)."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'bench-miner')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .add_extension(x509.SubjectKeyIdentifier.from_public_key(key.public_key()), critical=False)
+        .add_extension(x509.AuthorityKeyIdentifier.from_issuer_public_key(key.public_key()), critical=False)
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_network('127.0.0.0/8'))]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, 'miner.pem')
+    key_path = os.path.join(directory, 'miner.key')
+    with open(cert_path, 'wb') as file:
+        file.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, 'wb') as file:
+        file.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+def usage_payload(rng, hotkey):
+    return {
+        'hotkey': hotkey,
+        'benchmark_data': {
+            'CPU': {'CPU Score': rng.uniform(0, 5000)},
+            'RAM': {'RAM Score': rng.uniform(0, 5000)},
+            'Disk': {'Disk Score': rng.uniform(0, 5000)},
+        },
+        'usage_summary': {
+            api: {
+                'total_tokens_last_24_hours': rng.randint(0, 10 ** 6),
+                'total_tokens_last_12_hours': rng.randint(0, 10 ** 6),
+                'total_requests_last_24_hours': rng.randint(1, 5000),
+                'zero_value_entries_last_24_hours': rng.randint(0, 50),
+            }
+            for api in USAGE_APIS
+        },
+    }
+
+
+def serve_stand_ins(options, paths, ports, ready):
+    """Process target running the fake miner nodes and the stub verifier until terminated."""
+    from aiohttp import web
+
+    rng = random.Random(options['seed'])
+    hotkeys = {ip: hotkey for nodes in node_table(options['nodes'], options['nodes_per_miner']).values() for ip, hotkey in nodes}
+    # Dead nodes fail every request, unlike the random failures of node_failure_rate
+    dead = set(rng.sample(sorted(hotkeys), int(len(hotkeys) * options['dead_node_rate'])))
+    with open(paths['cert'], 'rb') as file:
+        cert_pem = file.read()
+    cert_bytes = list(cert_pem)
+
+    async def node_delay(ip):
+        await asyncio.sleep(rng.uniform(0, 2 * options['node_latency']))
+        return ip in dead or rng.random() < options['node_failure_rate']
+
+    def local_ip(request):
+        return request.transport.get_extra_info('sockname')[0]
+
+    async def report(request):
+        ip = local_ip(request)
+        if await node_delay(ip):
+            return web.Response(status=503)
+        # The stub verifier does not parse the report, it only has to be unique per node
+        return web.json_response({'cert': cert_bytes, 'report': {'measurement': ip}, 'miner_ip': ip})
+
+    async def usage(request):
+        ip = local_ip(request)
+        if await node_delay(ip):
+            return web.Response(status=503)
+        return web.json_response(usage_payload(rng, hotkeys.get(ip)))
+
+    async def verify(reports):
+        verdicts = []
+        with open(paths['verifier_db'], 'a') as db:
+            for body in reports:
+                await asyncio.sleep(options['verifier_latency'])
+                db.write(json.dumps({'cert': bytes(body['cert']).decode(), 'ip': body['miner_ip']}))
+                verdicts.append({'miner_ip': body['miner_ip'], 'verified': True, 'error': None})
+        return verdicts
+
+    async def verify_one(request):
+        await verify([await request.json()])
+        return web.Response(text='OK')
+
+    async def verify_batch(request):
+        return web.json_response(await verify(await request.json()))
+
+    async def main():
+        report_app = web.Application()
+        report_app.router.add_get('/report', report)
+        usage_app = web.Application()
+        usage_app.router.add_get('/fetch_token_usage/', usage)
+        verifier_app = web.Application(client_max_size=64 * 1024 ** 2)
+        verifier_app.router.add_post('/report', verify_one)
+        if not options['no_batch']:
+            verifier_app.router.add_post('/report/batch', verify_batch)
+
+        tls = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        tls.load_cert_chain(paths['cert'], paths['key'])
+        runners = []
+        # Nodes listen on every loopback address at once, the local address tells them apart
+        for app, host, port, ssl_context in (
+            (report_app, '0.0.0.0', ports['report'], None),
+            (usage_app, '0.0.0.0', ports['usage'], tls),
+            (verifier_app, '127.0.0.1', ports['verifier'], None),
+        ):
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, host, port, ssl_context=ssl_context, backlog=4096).start()
+            runners.append(runner)
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+class FakeDendrite:
+    """Answers GetNodeDetail from the node table and swallows every other synapse."""
+
+    def __init__(self, table, ports, latency, failure_rate, seed):
+        self.table = table
+        self.ports = ports
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.calls = {}
+
+    async def __call__(self, axons, synapse, deserialize=False, timeout=12):
+        kind = type(synapse).__name__
+        self.calls[kind] = self.calls.get(kind, 0) + 1
+        await asyncio.sleep(self.rng.uniform(0, 2 * self.latency))
+        if kind == 'GetNodeDetail' and self.rng.random() >= self.failure_rate:
+            synapse.response = [
+                {
+                    'ip': ip,
+                    'name': f'node-{ip}',
+                    'status': 'online',
+                    'port': self.ports['report'],
+                    'usage_port': self.ports['usage'],
+                    'certificate': None,
+                }
+                for ip, hotkey in self.table.get(axons[0].uid, [])
+            ]
+        return [synapse]
+
+
+def stand_in_components(config):
+    """Shard worker components: a FakeDendrite over the same node table, and no wallet."""
+    return FakeDendrite(*config.fake_dendrite), None
+
+
+class StubMetagraph:
+    def __init__(self, miners):
+        self.uids = np.arange(miners)
+        self.hotkeys = [miner_hotkey(uid) for uid in range(miners)]
+        self.axons = [types.SimpleNamespace(uid=uid, hotkey=hotkey) for uid, hotkey in enumerate(self.hotkeys)]
+        self.block = 1
+
+    def sync(self, subtensor=None):
+        pass
+
+
+class StubSubtensor:
+    def __init__(self, miners):
+        self._metagraph = StubMetagraph(miners)
+        self.weights_calls = 0
+
+    def metagraph(self, netuid):
+        return self._metagraph
+
+    def get_current_block(self):
+        return 1
+
+    def set_weights(self, **kwargs):
+        self.weights_calls += 1
+        return True, ""
+
+
+def run_benchmark(options, results):
+    """Process target running the validator cycles for one node count."""
+    workdir = tempfile.mkdtemp(prefix='bench_cycle_')
+    os.environ['DAASI_DB_PATH'] = os.path.join(workdir, 'validator.db')
+    os.environ.setdefault('DAASI_LOG_LEVEL', options['log_level'])
+    sys.path[:0] = [ROOT, os.path.join(ROOT, 'validators')]
+
+    cert_path, key_path = write_certificate(workdir)
+    paths = {'cert': cert_path, 'key': key_path, 'verifier_db': os.path.join(workdir, 'db.json')}
+    ports = {'report': free_port(), 'usage': free_port(), 'verifier': free_port()}
+    context = multiprocessing.get_context('spawn')
+    ready = context.Event()
+    stand_ins = context.Process(target=serve_stand_ins, args=(options, paths, ports, ready), daemon=True)
+    stand_ins.start()
+    if not ready.wait(60):
+        raise SystemExit("Stand-ins did not start")
+
+    import sqLite
+    sqLite.create_node_detail_table()
+    writes = {'statements': 0, 'commits': 0}
+
+    def count_writes(statement):
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+        if verb in ('INSERT', 'UPDATE', 'DELETE', 'REPLACE'):
+            writes['statements'] += 1
+        elif verb in ('COMMIT', 'END'):
+            writes['commits'] += 1
+
+    sqLite.connection.set_trace_callback(count_writes)
+
+    from ssl_pinning_client import close_pinned_session
+    from validators.base_validator import Validator
+    from validators.sharding import ShardCoordinator
+
+    table = node_table(options['nodes'], options['nodes_per_miner'])
+    subtensor = StubSubtensor(len(table))
+    dendrite = FakeDendrite(table, ports, options['dendrite_latency'], options['dendrite_failure_rate'], options['seed'])
+    config = types.SimpleNamespace(
+        netuid=1,
+        verifier_url=f"http://127.0.0.1:{ports['verifier']}",
+        verifier_db_path=paths['verifier_db'],
+        measurement_path=None,
+        weights_min_interval=0,
+        log_level=options['log_level'],
+        fake_dendrite=(table, ports, options['dendrite_latency'], options['dendrite_failure_rate'], options['seed']),
+    )
+
+    async def cycles():
+        validator = Validator(dendrite=dendrite, config=config, subtensor=subtensor, wallet=None)
+        if options['shards'] > 1:
+            validator.shard_coordinator = ShardCoordinator(validator, options['shards'], components=stand_in_components)
+            validator.shard_coordinator.start()
+        timings = []
+        try:
+            for _ in range(options['cycles']):
+                writes.update(statements=0, commits=0)
+                start = time.perf_counter()
+                result = await validator.get_nodes_ip_and_status()
+                if validator.score_broadcast is not None:
+                    # Part of the cycle's work even though weights no longer wait for it
+                    await validator.score_broadcast
+                await validator.notifications.drain()
+                timings.append({
+                    'seconds': time.perf_counter() - start,
+                    'ok': bool(result),
+                    'db_writes': writes['statements'],
+                    'db_commits': writes['commits'],
+                })
+        finally:
+            if validator.shard_coordinator is not None:
+                validator.shard_coordinator.close()
+            await validator.notifications.close()
+            await validator.attestation_client.close()
+            await close_pinned_session()
+        return timings
+
+    try:
+        timings = asyncio.run(cycles())
+    finally:
+        stand_ins.terminate()
+        stand_ins.join()
+
+    results.put({
+        'nodes': options['nodes'],
+        'miners': len(table),
+        'cycles': timings,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'dendrite_calls': dendrite.calls,
+        'weights_calls': subtensor.weights_calls,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--nodes-per-miner', type=int, default=1)
+    parser.add_argument('--cycles', type=int, default=2, help="Cycles per node count, later ones run with warm caches.")
+    parser.add_argument('--node-latency', type=float, default=0.02, help="Mean latency in seconds of a fake node response.")
+    parser.add_argument('--node-failure-rate', type=float, default=0.0)
+    parser.add_argument('--dead-node-rate', type=float, default=0.0, help="Fraction of nodes that fail every request.")
+    parser.add_argument('--dendrite-latency', type=float, default=0.02, help="Mean latency in seconds of a fake dendrite call.")
+    parser.add_argument('--dendrite-failure-rate', type=float, default=0.0)
+    parser.add_argument('--verifier-latency', type=float, default=0.001, help="Seconds the stub verifier spends per report.")
+    parser.add_argument('--shards', type=int, default=0, help="Shard worker processes, as the validator's --shards.")
+    parser.add_argument('--no-batch', action='store_true', help="Serve only the single report endpoint from the stub verifier.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--json', action='store_true', help="Print one JSON object per node count instead of a table.")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    if not args.json:
+        print(f"{'nodes':>6} {'miners':>6} {'first cycle':>12} {'later cycles':>13} {'peak RSS':>10} {'DB writes':>10} {'commits':>8}")
+    for nodes in args.nodes:
+        options = {
+            'nodes': nodes,
+            'nodes_per_miner': max(1, args.nodes_per_miner),
+            'cycles': max(1, args.cycles),
+            'node_latency': args.node_latency,
+            'node_failure_rate': args.node_failure_rate,
+            'dead_node_rate': args.dead_node_rate,
+            'dendrite_latency': args.dendrite_latency,
+            'dendrite_failure_rate': args.dendrite_failure_rate,
+            'verifier_latency': args.verifier_latency,
+            'no_batch': args.no_batch,
+            'shards': args.shards,
+            'seed': args.seed,
+            'log_level': args.log_level,
+        }
+        results = context.Queue()
+        process = context.Process(target=run_benchmark, args=(options, results))
+        process.start()
+        while True:
+            try:
+                result = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    raise SystemExit(f"Benchmark for {nodes} nodes exited with code {process.exitcode}")
+        process.join()
+
+        if args.json:
+            print(json.dumps(result))
+            continue
+        first, later = result['cycles'][0], result['cycles'][1:]
+        later_time = f"{sum(cycle['seconds'] for cycle in later) / len(later):12.2f}s" if later else f"{'-':>13}"
+        print(
+            f"{nodes:>6} {result['miners']:>6} {first['seconds']:11.2f}s {later_time} "
+            f"{result['peak_rss_mb']:8.1f}MB {first['db_writes']:>10} {first['db_commits']:>8}"
+        )
+
+
+if __name__ == '__main__':
+    main()
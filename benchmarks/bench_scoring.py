@@ -0,0 +1,147 @@
+"""Benchmark of the columnar scoring engine against the original per-row implementation.
+
+Run from the repository root:
+
+    PYTHONPATH=. python benchmarks/bench_scoring.py --miners 100000
+"""
+import argparse
+import random
+import time
+import uuid
+
+from validators.miner_table import MinerTable
+from validators.scoring import miner_rows_to_columns, normalize_scores, ranked_list, score_columns
+
+
+def reference_normalize_scores(miner_data):
+    """The per-row implementation the columnar engine replaced, kept as the parity oracle."""
+    base_scores = {}
+    error_rates = {}
+
+    for data in miner_data:
+        id, miner_id, cpu_score, ram_score, disk_score, openai_tokens, groq_tokens, claude_tokens, gemini_tokens, total_requests, zero_value_entries = data
+
+        cpu_score = cpu_score if cpu_score is not None else 0
+        ram_score = ram_score if ram_score is not None else 0
+        disk_score = disk_score if disk_score is not None else 0
+        openai_tokens = openai_tokens if openai_tokens is not None else 0
+        groq_tokens = groq_tokens if groq_tokens is not None else 0
+        claude_tokens = claude_tokens if claude_tokens is not None else 0
+        gemini_tokens = gemini_tokens if gemini_tokens is not None else 0
+        total_requests = total_requests if total_requests is not None else 0
+        zero_value_entries = zero_value_entries if zero_value_entries is not None else 0
+
+        base_scores[miner_id] = (
+            cpu_score * 0.1 +
+            ram_score * 0.05 +
+            disk_score * 0.05 +
+            groq_tokens * 0.25 +
+            openai_tokens * 0.15 +
+            claude_tokens * 0.15 +
+            gemini_tokens * 0.25
+        )
+        error_rates[miner_id] = zero_value_entries / total_requests if total_requests > 0 else 0
+
+    adjusted_scores = {}
+    max_error_rate = max(error_rates.values())
+    for miner_id, base_score in base_scores.items():
+        error_rate = error_rates[miner_id]
+        if error_rate > 0.1:
+            adjustment = 1 - (error_rate - 0.1) * 2
+        elif 0.02 <= error_rate <= 0.1:
+            adjustment = 1
+        else:
+            if max_error_rate > 0.1:
+                adjustment = 1 + (0.02 - error_rate) / 0.02 * 0.1
+            else:
+                adjustment = 1
+        adjusted_score = base_score * adjustment
+        if max_error_rate > 0:
+            relative_error = error_rate / max_error_rate
+            adjusted_score *= (1 + (0.5 - relative_error))
+        adjusted_scores[miner_id] = adjusted_score
+
+    total_score = sum(adjusted_scores.values())
+    normalized_scores = {miner_id: score / total_score for miner_id, score in adjusted_scores.items() if total_score > 0}
+    final_results = [(miner_id, score) for miner_id, score in normalized_scores.items()]
+    final_results.sort(key=lambda x: x[1], reverse=True)
+    return [(miner_id, score, rank + 1) for rank, (miner_id, score) in enumerate(final_results)]
+
+
+def synthetic_miner_data(count, seed=0):
+    """Builds miner_data rows shaped like the SQLite table, with some missing values and idle miners."""
+    rng = random.Random(seed)
+    rows = []
+    for miner_id in range(count):
+        total_requests = rng.choice([0, rng.randint(1, 5000)])
+        rows.append((
+            str(uuid.UUID(int=rng.getrandbits(128))),
+            miner_id,
+            rng.uniform(0, 5000),
+            rng.uniform(0, 5000),
+            None if rng.random() < 0.01 else rng.uniform(0, 5000),
+            rng.randint(0, 10 ** 7),
+            rng.randint(0, 10 ** 7),
+            rng.randint(0, 10 ** 7),
+            rng.randint(0, 10 ** 7),
+            total_requests,
+            rng.randint(0, total_requests),
+        ))
+    return rows
+
+
+def best_of(repeat, fn, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def incremental_updates(table, updates):
+    """Applies (uid, increments) updates to a MinerTable, as the node results of a cycle would."""
+    for uid, increments in updates:
+        table.add(uid, increments)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--miners', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--updates', type=int, default=10_000, help="Node results applied to the incremental table.")
+    args = parser.parse_args()
+
+    rows = synthetic_miner_data(args.miners)
+    reference_time, expected = best_of(1, reference_normalize_scores, rows)
+    load_time, (miner_ids, values) = best_of(args.repeat, miner_rows_to_columns, rows)
+    score_time, ranking = best_of(args.repeat, score_columns, miner_ids, values)
+    convert_time, ranked = best_of(args.repeat, ranked_list, ranking)
+    end_to_end_time, from_rows = best_of(args.repeat, normalize_scores, rows)
+
+    table = MinerTable()
+    table.load(rows)
+    updates = [(row[1], values[:, position] * 0.01) for position, row in enumerate(rows[:args.updates])]
+    update_time, _ = best_of(1, incremental_updates, table, updates)
+    ranking_time, incremental = best_of(1, table.ranking)
+    updated_rows = [(None,) + table.get(row[1]) for row in rows]
+
+    if ranked != expected or from_rows != expected:
+        raise SystemExit("Columnar scoring does not match the reference implementation")
+    if ranked_list(incremental) != reference_normalize_scores(updated_rows):
+        raise SystemExit("Incremental scoring does not match the reference implementation")
+
+    print(f"miners:                {args.miners}")
+    print(f"reference (per-row):   {reference_time * 1000:9.2f} ms")
+    print(f"rows -> columns:       {load_time * 1000:9.2f} ms")
+    print(f"columnar scoring:      {score_time * 1000:9.2f} ms")
+    print(f"arrays -> tuples:      {convert_time * 1000:9.2f} ms")
+    print(f"rows end to end:       {end_to_end_time * 1000:9.2f} ms")
+    print(f"incremental update:    {update_time / max(1, len(updates)) * 1e6:9.2f} us per node")
+    print(f"incremental ranking:   {ranking_time * 1000:9.2f} ms")
+    print("results identical:     yes")
+
+
+if __name__ == '__main__':
+    main()
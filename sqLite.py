@@ -1,6 +1,19 @@
+import os
 import sqlite3
 
-connection = sqlite3.connect('local_database.db')
+DB_PATH = os.environ.get('DAASI_DB_PATH', 'local_database.db')
+
+
+def connect(path=DB_PATH):
+    """Opens a connection in WAL mode so readers never block the single writer."""
+    conn = sqlite3.connect(path, cached_statements=256)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+connection = connect()
 cursor = connection.cursor()
 
 
@@ -16,7 +29,7 @@ def create_node_detail_table():
                     ip TEXT,                     -- Nullable
                     port INTEGER,                -- Nullable
                     usage_port INTEGER,          -- Nullable
-                    miner_id INTEGER NOT NULL,    
+                    miner_id INTEGER NOT NULL,
                     hotkey TEXT,                 -- Nullable
                     certificate TEXT             -- Nullable
                 );
@@ -38,17 +51,49 @@ def create_node_detail_table():
             """,
             """
                 CREATE TABLE IF NOT EXISTS normalized_scores (
-                    id TEXT PRIMARY KEY,  
+                    id TEXT PRIMARY KEY,
                     miner_id INTEGER NOT NULL,
-                    score REAL NOT NULL,  
+                    score REAL NOT NULL,
                     rank INTEGER NOT NULL
                 );
+            """,
+            """
+                CREATE TABLE IF NOT EXISTS node_health (
+                    miner_id INTEGER NOT NULL,
+                    ip TEXT NOT NULL,
+                    consecutive_failures INTEGER NOT NULL,
+                    next_probe_at REAL NOT NULL,        -- Unix time before which the node is not probed
+                    PRIMARY KEY (miner_id, ip)
+                );
             """
         ]
         # normalized_score
         for query in queries:
             cursor.execute(query)
-        
+
         connection.commit()
+        create_indexes()
     except Exception as e:
         print("**-- Error in docker_tool_info --**", e)
+
+
+def create_indexes():
+    """Creates the lookup indexes and the unique keys the upserts conflict on."""
+    try:
+        print("Creating Indexes...")
+        queries = [
+            # Older databases may hold duplicates from the select/delete/insert helpers, keep the newest row
+            "DELETE FROM node_detail WHERE rowid NOT IN (SELECT MAX(rowid) FROM node_detail GROUP BY miner_id, ip)",
+            "DELETE FROM miner_data WHERE rowid NOT IN (SELECT MAX(rowid) FROM miner_data GROUP BY miner_id)",
+            "DELETE FROM normalized_scores WHERE rowid NOT IN (SELECT MAX(rowid) FROM normalized_scores GROUP BY miner_id)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_node_detail_miner_ip ON node_detail (miner_id, ip)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_node_detail_placeholder ON node_detail (miner_id) WHERE ip IS NULL",
+            "CREATE INDEX IF NOT EXISTS idx_node_detail_ip ON node_detail (ip)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_miner_data_miner_id ON miner_data (miner_id)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_normalized_scores_miner_id ON normalized_scores (miner_id)",
+        ]
+        with connection:
+            for query in queries:
+                cursor.execute(query)
+    except Exception as e:
+        print("**-- Error in create_indexes --**", e)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+
+import aiohttp
+
+from validators.request_policy import AttemptFailed, RequestFailed, RequestPolicy
+
+logger = logging.getLogger('colorful_logger')
+
+
+class _BatchRejected(Exception):
+    """The verifier answered the batch endpoint with a 4xx status, held in args[0]."""
+
+
+class AttestationClient:
+    """Non-blocking HTTP client for miner attestation reports and the local verifier."""
+
+    def __init__(self, verifier_url="http://localhost:8080", max_connections=100, timeout=10, report_policy=None, verifier_policy=None,
+                 batch_timeout=120, batch_concurrency=4):
+        self.verifier_url = verifier_url.rstrip('/')
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        # Reports are idempotent GETs to miners and may be hedged, verifier posts are never hedged
+        self.report_policy = report_policy or RequestPolicy(attempt_timeout=timeout)
+        self.verifier_policy = verifier_policy or RequestPolicy(deadline=60, attempt_timeout=timeout)
+        # The verifier keeps checking a batch the client gave up on, so only a batch that never reached it is retried
+        self.batch_timeout = aiohttp.ClientTimeout(total=batch_timeout)
+        self.batch_policy = RequestPolicy(
+            deadline=2 * batch_timeout, attempt_timeout=batch_timeout, retry_on=(aiohttp.ClientConnectorError,)
+        )
+        self.batch_concurrency = batch_concurrency
+        self._miner_session = None
+        self._verifier_session = None
+        # None until the verifier answered a batch request, False when it has no batch endpoint
+        self.batch_supported = None
+
+    def _get_miner_session(self):
+        if self._miner_session is None or self._miner_session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=4, keepalive_timeout=60)
+            self._miner_session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._miner_session
+
+    def _get_verifier_session(self):
+        if self._verifier_session is None or self._verifier_session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._verifier_session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._verifier_session
+
+    async def fetch_report(self, url, params=None):
+        """Fetches an attestation report from a miner node. Returns the decoded JSON or None."""
+        session = self._get_miner_session()
+
+        async def attempt():
+            async with session.get(url, params=params) as response:
+                if response.status != 200:
+                    raise AttemptFailed(f"status code {response.status}")
+                try:
+                    return await response.json(content_type=None)
+                except ValueError as e:
+                    raise AttemptFailed(f"undecodable report body: {e}")
+
+        try:
+            return await self.report_policy.run(attempt, 'report_fetch')
+        except RequestFailed as e:
+            logger.error(f"Fetching {url} failed: {e}")
+            return None
+
+    async def send_report(self, ip_res):
+        """Posts a report to the verifier. Returns (status_code, text), or (None, None) when the verifier did not answer."""
+        session = self._get_verifier_session()
+        url = f"{self.verifier_url}/report"
+
+        async def attempt():
+            async with session.post(url, json=ip_res) as response:
+                text = await response.text()
+                if 400 <= response.status < 500:
+                    # A rejected report is a verdict, posting it again would only verify it again
+                    return response.status, text
+                response.raise_for_status()
+                return response.status, text
+
+        try:
+            return await self.verifier_policy.run(attempt, 'verifier_post')
+        except RequestFailed as e:
+            logger.error(f"Posting report failed: {e}")
+            return None, None
+
+    async def send_reports_batch(self, reports, chunk_size=32):
+        """Posts reports to the verifier's batch endpoint in chunks of chunk_size, batch_concurrency at a time.
+
+        Returns one (status_code, text) per report in input order, with 200 for verified reports and
+        (None, None) for reports whose chunk could not be delivered. Falls back to one POST per report
+        when the verifier has no batch endpoint.
+        """
+        size = max(1, chunk_size)
+        semaphore = asyncio.Semaphore(max(1, self.batch_concurrency))
+
+        async def send(chunk):
+            async with semaphore:
+                if self.batch_supported is False:
+                    return [await self.send_report(report) for report in chunk]
+                return await self._send_chunk(chunk)
+
+        chunks = await asyncio.gather(*(send(reports[start:start + size]) for start in range(0, len(reports), size)))
+        return [result for chunk in chunks for result in chunk]
+
+    async def _send_chunk(self, chunk):
+        session = self._get_verifier_session()
+        url = f"{self.verifier_url}/report/batch"
+
+        async def attempt():
+            async with session.post(url, json=chunk, timeout=self.batch_timeout) as response:
+                if 400 <= response.status < 500:
+                    raise _BatchRejected(response.status)
+                response.raise_for_status()
+                try:
+                    verdicts = await response.json(content_type=None)
+                except ValueError as e:
+                    raise AttemptFailed(f"undecodable verdicts: {e}")
+            if not isinstance(verdicts, list) or len(verdicts) != len(chunk):
+                raise AttemptFailed(f"verifier did not return one verdict per report for {len(chunk)} reports")
+            try:
+                return [
+                    (200, "OK") if verdict['verified'] else (400, verdict.get('error') or "Failed to verify attestation report")
+                    for verdict in verdicts
+                ]
+            except (KeyError, TypeError, AttributeError) as e:
+                raise AttemptFailed(f"malformed verdict: {e!r}")
+
+        try:
+            results = await self.batch_policy.run(attempt, 'verifier_post')
+        except _BatchRejected as e:
+            status = e.args[0]
+            if status in (404, 405):
+                logger.warning("Verifier has no batch endpoint, falling back to one request per report")
+                self.batch_supported = False
+            else:
+                logger.warning(f"Verifier rejected a batch of {len(chunk)} reports with status {status}, posting them one by one")
+            return [await self.send_report(report) for report in chunk]
+        except (RequestFailed, AttemptFailed, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Posting a batch of {len(chunk)} reports failed: {e!r}")
+            return [(None, None)] * len(chunk)
+        self.batch_supported = True
+        return results
+
+    async def close(self):
+        """Closes the pooled sessions."""
+        for session in (self._miner_session, self._verifier_session):
+            if session is not None and not session.closed:
+                await session.close()
+        self._miner_session = None
+        self._verifier_session = None
@@ -3,62 +3,45 @@ import asyncio
 import json
 import logging
 import os
-import requests
-from requests.exceptions import RequestException
+import time
 from collections import defaultdict
+import numpy as np
 import torch
-from colorama import Fore, Style, init
 import bittensor as bt
 from abc import ABC, abstractmethod
 from template.protocol import *
-from ssl_pinning_client import api_fetch_token_usage
+from ssl_pinning_client import api_fetch_token_usage, invalidate_pinned_certificate
+from validators.attestation_client import AttestationClient
+from validators.cert_store import VerifierCertStore
+from validators.log_setup import setup_logging
+from validators.metagraph_cache import MetagraphCache
+from validators.metrics import count_retry, track
+from validators.miner_table import VALUE_COLUMNS, MinerTable
+from validators.node_health import NodeHealth
+from validators.notification_outbox import NotificationOutbox
+from validators.request_policy import AttemptFailed, RequestFailed, RequestPolicy
+from validators.usage_history import UsageHistory, compact_usage
+from validators.verdict_cache import VerdictCache, report_digest
+from validators.scoring import adjust_scores, normalize_scores, ranked_list
 from sqLite import *
 from validators.query.table_miner_data import *
 from validators.query.table_node_detail import *
+from validators.query.table_node_health import *
 from validators.query.table_normalized_score import *
-from time import sleep
 
-node_info_usage_detail = {}
-
-init()
-
-# Create a logger
-logger = logging.getLogger('colorful_logger')
-logger.setLevel(logging.DEBUG)
-
-# Create console handler
-ch = logging.StreamHandler()
-ch.setLevel(logging.DEBUG)
-
-# Define the log format
-log_format = "%(asctime)s |     %(levelname)s     | %(message)s"
-log_formats = {
-    logging.DEBUG: Fore.BLUE + log_format + Style.RESET_ALL,
-    logging.INFO: Fore.GREEN + log_format + Style.RESET_ALL,
-    logging.WARNING: Fore.YELLOW + log_format + Style.RESET_ALL,
-    logging.ERROR: Fore.RED + log_format + Style.RESET_ALL,
-    logging.CRITICAL: Fore.RED + Style.BRIGHT + log_format + Style.RESET_ALL
-}
-
-# Create a custom formatter
-class ColorFormatter(logging.Formatter):
-    def format(self, record):
-        log_fmt = log_formats.get(record.levelno, log_format)
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
-
-# Add the custom formatter to the console handler
-ch.setFormatter(ColorFormatter())
-
-# Add the console handler to the logger
-logger.addHandler(ch)
+logger = setup_logging()
 
 node_detail = {}
-miner_data = {}
 normalized_score = []
 
+def is_node_list(nodes):
+    """True for a GetNodeDetail answer that is a list of nodes, each with an ip and a port."""
+    return isinstance(nodes, list) and all(
+        isinstance(item, dict) and isinstance(item.get('ip'), str) and 'port' in item for item in nodes
+    )
+
 class BaseValidator(ABC):
-    def __init__(self, dendrite, config, subtensor, wallet, timeout=5, db_path='/home/ubuntu/verifier/db.json'):
+    def __init__(self, dendrite, config, subtensor, wallet, timeout=5, db_path='/home/ubuntu/verifier/db.json', metagraph=None):
         bt.logging.info("BaseValidator initialized.")
         self.dendrite = dendrite
         self.config = config
@@ -66,12 +49,89 @@ class BaseValidator(ABC):
         self.wallet = wallet
         self.timeout = timeout
         self.streaming = False
-        self.metagraph = subtensor.metagraph(config.netuid)
-        self.db_path = db_path
+        self.metagraph_cache = MetagraphCache(
+            subtensor,
+            config.netuid,
+            metagraph=metagraph,
+            refresh_blocks=getattr(config, 'metagraph_refresh_blocks', 100),
+            refresh_seconds=getattr(config, 'metagraph_refresh_seconds', 20 * 60),
+        )
+        self.metagraph_cache.add_listener(self.on_metagraph_change)
+        self.metagraph_cache.add_listener(self.forget_node_lists)
+        self.uid_index = {}
+        self.uid_index_version = None
+        self.db_path = getattr(config, 'verifier_db_path', None) or db_path
+        self.cert_store = VerifierCertStore(self.db_path)
+        self.verdict_cache = VerdictCache(
+            measurement_path=getattr(config, 'measurement_path', 'attestation/measurement.json'),
+            ttl=getattr(config, 'verdict_ttl', 3600),
+            max_size=getattr(config, 'verdict_cache_size', 10000),
+        )
+        self.discovery_concurrency = getattr(config, 'discovery_concurrency', 64)
+        self.discovery_retries = getattr(config, 'discovery_retries', 1)
+        self.discovery_latency = {}
+        self.discovery_sweep_seconds = getattr(config, 'discovery_sweep_seconds', 3600)
+        # {uid: (monotonic time, node list)} of the last successful discovery of every uid
+        self.node_lists = {}
+        self.miner_table = MinerTable()
+        # Reused for every node so accumulating a node's usage allocates nothing
+        self._increments = np.zeros(len(VALUE_COLUMNS))
+        self.updated_miners = set()
+        self.usage_history = UsageHistory(getattr(config, 'usage_history_depth', 24))
+        self.node_health = NodeHealth(
+            base_delay=getattr(config, 'node_backoff_base', 600),
+            max_delay=getattr(config, 'node_backoff_max', 6 * 3600),
+        )
+        self.score_workers = max(1, getattr(config, 'score_workers', 20))
+        self.node_timeout = getattr(config, 'node_timeout', 30)
+        self.score_broadcast_timeout = getattr(config, 'score_broadcast_timeout', timeout)
+        self.score_broadcast = None
+        self.notifications = NotificationOutbox(self.notify_miner_failure, getattr(config, 'notification_concurrency', 8))
+        self.weights_min_interval = getattr(config, 'weights_min_interval', 300)
+        self.weights_refresh_interval = getattr(config, 'weights_refresh_interval', 3600)
+        self.last_weights = None
+        self.last_weights_at = None
+        self.verifier_batch_size = max(1, getattr(config, 'verifier_batch_size', 32))
+        # Set to a ShardCoordinator to run the per-node stages in worker processes
+        self.shard_coordinator = None
+        # One budget per node request: retries and hedged requests all fit in node_timeout
+        policy_options = dict(
+            deadline=self.node_timeout,
+            attempt_timeout=getattr(config, 'request_attempt_timeout', 10),
+            max_attempts=getattr(config, 'request_attempts', 3),
+            backoff_base=getattr(config, 'request_backoff', 1),
+            hedge_quantile=getattr(config, 'hedge_quantile', 0.95) or None,
+        )
+        # api_fetch_token_usage reports every failure as an HTTPException, so any error is retried
+        self.usage_policy = RequestPolicy(retry_on=(Exception,), **policy_options)
+        self.attestation_client = AttestationClient(
+            verifier_url=getattr(config, 'verifier_url', "http://localhost:8080"),
+            report_policy=RequestPolicy(**policy_options),
+            batch_timeout=getattr(config, 'verifier_batch_timeout', 120),
+            batch_concurrency=getattr(config, 'verifier_batch_concurrency', 4),
+        )
+
+    @property
+    def metagraph(self):
+        return self.metagraph_cache.metagraph
+
+    def on_metagraph_change(self, diff):
+        """Drops stored data of uids that were deregistered or taken over by a new hotkey."""
+        stale = diff.removed + [uid for uid, old_hotkey, new_hotkey in diff.changed]
+        if not stale:
+            return
+        logger.info(f"Dropping stored data of {len(stale)} deregistered or re-registered uids: {stale}")
+        delete_node_detail_by_miner_ids(stale)
+        delete_miner_data(stale)
+        delete_normalized_scores(stale)
+        delete_node_health_by_miner_ids(stale)
+        self.miner_table.remove(stale)
+        self.usage_history.forget(stale)
+        self.node_health.forget(stale)
 
 class Validator(BaseValidator):
-    def __init__(self, dendrite=None, config=None, subtensor=None, wallet=None):
-        super().__init__(dendrite, config, subtensor, wallet, timeout=5)
+    def __init__(self, dendrite=None, config=None, subtensor=None, wallet=None, metagraph=None):
+        super().__init__(dendrite, config, subtensor, wallet, timeout=5, metagraph=metagraph)
         
         # Define the version of the template module.
         __version__ = "1.4.1"
@@ -94,55 +154,92 @@ class Validator(BaseValidator):
     def get_valid_miners_info(self):
         return [int(uid) for uid in self.metagraph.uids]
 
-    def set_weights(self, score, miner_id):
+    def get_uid_index(self):
+        """Returns {uid: (hotkey, axon)}, rebuilt only when the metagraph version changes."""
+        if self.uid_index_version != self.metagraph_cache.version:
+            metagraph = self.metagraph
+            self.uid_index = {
+                int(uid): (hotkey, axon)
+                for uid, hotkey, axon in zip(metagraph.uids.tolist(), metagraph.hotkeys, metagraph.axons)
+            }
+            self.uid_index_version = self.metagraph_cache.version
+        return self.uid_index
+
+    def set_weights(self, ranking):
+        """Commits the whole (miner_id, score, rank) ranking as a single weights extrinsic."""
         try:
-            if score < 0:
-                score = 0
-            score_tensor = torch.tensor([score])  # Wrap score in a list
-            logger.info("score_tensor: %s", score_tensor)
+            uids = []
+            scores = []
+            for miner_id, score, rank in ranking:
+                if not (0 <= miner_id < len(self.metagraph.hotkeys)):
+                    logger.warning(f"Skipping weight for unknown miner {miner_id}")
+                    continue
+                uids.append(int(miner_id))
+                scores.append(max(float(score), 0.0))
+            if not uids:
+                logger.warning("No miners to set weights for")
+                return False
+
+            score_tensor = torch.tensor(scores)
             weights: torch.FloatTensor = torch.nn.functional.normalize(score_tensor, p=1.0, dim=0).float()
-            logger.info("weight: %s", weights)
-            bt.logging.info(f"🏋️ Weight of miners : {weights.tolist()}")
-            result = self.subtensor.set_weights(
-                wallet=self.wallet,
-                netuid=self.config.netuid,
-                uids=[miner_id],
-                weights=weights,
-                wait_for_inclusion=False,
-                wait_for_finalization=False,
-                version_key=self.__version_as_int__
-            )
+            signature = (tuple(uids), tuple(round(weight, 6) for weight in weights.tolist()))
 
-            if result[0]['code'] == 0:
-                bt.logging.success("✅ Successfully set weights.")
+            now = time.monotonic()
+            since_last = now - self.last_weights_at if self.last_weights_at is not None else None
+            if signature == self.last_weights and since_last < self.weights_refresh_interval:
+                logger.info("Weights unchanged since the last commit, skipping set_weights")
+                return True
+            if since_last is not None and since_last < self.weights_min_interval:
+                logger.info(f"Weights were set {since_last:.0f}s ago, waiting for the {self.weights_min_interval}s rate limit")
+                return False
+
+            bt.logging.info(f"🏋️ Weight of miners : {dict(zip(uids, weights.tolist()))}")
+            with track('set_weights') as stage:
+                result = self.subtensor.set_weights(
+                    wallet=self.wallet,
+                    netuid=self.config.netuid,
+                    uids=uids,
+                    weights=weights,
+                    wait_for_inclusion=False,
+                    wait_for_finalization=False,
+                    version_key=self.__version_as_int__
+                )
+                success, message = result if isinstance(result, tuple) else (result, "")
+                if not success:
+                    stage.fail()
+
+            if success:
+                self.last_weights = signature
+                self.last_weights_at = now
+                bt.logging.success(f"✅ Successfully set weights for {len(uids)} miners.")
             else:
-                bt.logging.error(f"❌ Failed to set weights. Error: {result[0]['message']}")
+                bt.logging.error(f"❌ Failed to set weights. Error: {message}")
+            return success
         except Exception as e:
             bt.logging.error(f"An error occurred while setting weights: {e}")
+            return False
 
     async def calculate_miners_scores_v2(self):
         try:
-            miner_data = miner_data_get_all()
+            if not self.miner_table.loaded:
+                self.load_miner_data()
             logger.info("Request initiated to normalize node score")
 
-            if len(miner_data) > 0:
-                score_result = self.normalize_scores(miner_data)
-                print("score_result...", score_result)
-                for score in score_result:
-                    insert_data_in_normalized_score(score)
-                logger.info("Normalized score saved successfully...")
+            if len(self.miner_table) > 0:
+                with track('scoring'):
+                    # Base scores and error rates are kept current by the accumulator, this only ranks
+                    score_result = ranked_list(self.miner_table.ranking())
+                logger.debug("score_result... %s", score_result)
+                if replace_normalized_scores(score_result):
+                    logger.info("Normalized score saved successfully...")
             
             normalized_score = get_all_data_from_normalized_score()
             logger.info("Normalized score result obtained successfully")
-            for score in normalized_score:
-                id, miner_id, miner_score, rank = score
-                logger.info(f"Sending score to the respective miner: {miner_score}")
-                
-                miner_node_detail = {'score': miner_score, 'rank': rank, 'Validator_name': 'Validator-1.0'}
-                syn = SendMinerScore(details=miner_node_detail)
-                await self.query_miner(self.metagraph, miner_id, syn) 
-                logger.info(f"Setting weight for miner {miner_id}")
-                self.set_weights(miner_score, miner_id)
+            # Miners are notified in the background, weights do not wait for the broadcast
+            self.start_score_broadcast(normalized_score)
+
+            logger.info(f"Setting weights for {len(normalized_score)} miners")
+            self.set_weights([(miner_id, miner_score, rank) for id, miner_id, miner_score, rank in normalized_score])
 
             # miner_data = {}
 
@@ -150,6 +247,36 @@ class Validator(BaseValidator):
             logger.error(f"Error in calculate_miners_scores_v2: {e}")
             return False
 
+    def start_score_broadcast(self, normalized_score):
+        """Starts broadcasting the scores in a background task, cancelling a broadcast still running."""
+        if self.score_broadcast is not None and not self.score_broadcast.done():
+            logger.warning("Previous score broadcast is still running, cancelling it")
+            self.score_broadcast.cancel()
+        self.score_broadcast = asyncio.ensure_future(self.broadcast_scores(normalized_score))
+        return self.score_broadcast
+
+    async def broadcast_scores(self, normalized_score):
+        """Sends every miner its score and rank concurrently, so the whole broadcast takes one timeout window."""
+        uid_index = self.get_uid_index()
+        calls = []
+        for id, miner_id, miner_score, rank in normalized_score:
+            if miner_id not in uid_index:
+                logger.warning(f"Skipping score of unknown miner {miner_id}")
+                continue
+            logger.debug("Sending score %s to miner %s", miner_score, miner_id)
+            miner_node_detail = {'score': miner_score, 'rank': rank, 'Validator_name': 'Validator-1.0'}
+            syn = SendMinerScore(details=miner_node_detail)
+            calls.append(self.dendrite([uid_index[miner_id][1]], syn, deserialize=False, timeout=self.score_broadcast_timeout))
+        if not calls:
+            return 0
+        with track('score_broadcast') as stage:
+            results = await asyncio.gather(*calls, return_exceptions=True)
+            failed = sum(1 for result in results if isinstance(result, Exception))
+            if failed:
+                stage.fail()
+        logger.info(f"Sent scores to {len(results) - failed}/{len(results)} miners")
+        return len(results) - failed
+
     async def fetch_score_and_resources_from_node(self, node_info):
         try:
             logger.info("Request initiated to fetch node score.")
@@ -158,54 +285,82 @@ class Validator(BaseValidator):
             logger.error(f"Error in fetch_score_and_resources_from_node: {e}")
             return False
 
+    async def discover_miners(self, uids):
+        """Queries GetNodeDetail from all uids concurrently, retrying only the miners that failed."""
+        semaphore = asyncio.Semaphore(max(1, self.discovery_concurrency))
+        latencies = {}
+
+        async def query(uid):
+            async with semaphore:
+                start = time.perf_counter()
+                with track('discovery') as stage:
+                    res = await self.query_miner(self.metagraph, uid, GetNodeDetail(), timeout=self.timeout)
+                    response = res[0].response if isinstance(res, list) and res else None
+                    if not response:
+                        stage.fail()
+                latencies[uid] = time.perf_counter() - start
+            return response or None
+
+        responses = dict(zip(uids, await asyncio.gather(*(query(uid) for uid in uids))))
+
+        for attempt in range(self.discovery_retries):
+            failed = [uid for uid, response in responses.items() if not response]
+            if not failed:
+                break
+            logger.info(f"Retrying discovery for {len(failed)} miners (attempt {attempt + 1}/{self.discovery_retries})")
+            count_retry('discovery', len(failed))
+            responses.update(zip(failed, await asyncio.gather(*(query(uid) for uid in failed))))
+
+        for uid in uids:
+            logger.debug(f"Discovery latency for miner {uid}: {latencies.get(uid, 0):.3f}s")
+        if latencies:
+            logger.info(
+                f"Discovered {sum(1 for response in responses.values() if response)}/{len(uids)} miners, "
+                f"slowest {max(latencies.values()):.3f}s"
+            )
+        self.discovery_latency = latencies
+        return responses
+
+    def forget_node_lists(self, diff):
+        """Drops the node lists of uids that were deregistered or taken over, so they are discovered again."""
+        for uid in diff.removed + [uid for uid, old_hotkey, new_hotkey in diff.changed]:
+            self.node_lists.pop(uid, None)
+
+    async def discover_due_miners(self, uids):
+        """Discovers only the uids without a recent node list and reuses the last node list of the others.
+
+        A uid is due when it is new or re-registered, when its last discovery failed or when its node
+        list is older than discovery_sweep_seconds, so stable miners are swept at that slower pace.
+        """
+        now = time.monotonic()
+        due = [uid for uid in uids if uid not in self.node_lists or now - self.node_lists[uid][0] >= self.discovery_sweep_seconds]
+        responses = await self.discover_miners(due) if due else {}
+        for uid, nodes in responses.items():
+            if nodes and is_node_list(nodes):
+                self.node_lists[uid] = (now, nodes)
+            else:
+                self.node_lists.pop(uid, None)
+        logger.info(f"Discovering {len(due)} due miners, reusing the node lists of {len(uids) - len(due)}")
+        return {uid: responses[uid] if uid in responses else self.node_lists[uid][1] for uid in uids}
+
     async def get_nodes_ip_and_status(self):
         try:
             logger.info("Request initiated to get nodes IP and status...")
-            syn = GetNodeDetail()
+            self.notifications.new_cycle()
+            if not self.node_health.loaded:
+                self.node_health.load(get_all_node_health() or [])
+            await self.metagraph_cache.maybe_refresh()
 
-            # miner_id = 69
             uids = self.get_valid_miners_info()
-            # uids = [59]
-            hotkeys = self.metagraph.hotkeys
-            print("uids...", uids)
-            for item in uids:
-                # if item == miner_id:
-                    nodes_list_res = (await self.query_miner(self.metagraph, item, syn))[0]
-                    print("Node list res...", nodes_list_res)
-                    print("fetching data for miner...", item)
-
-                    retry_count = 0
-                    while not nodes_list_res.response and retry_count < 1:
-                        logger.info(f"Retrying query for miner {item}")
-                        nodes_list_res = (await self.query_miner(self.metagraph, item, syn))[0]
-                        retry_count += 1
-                    
-                    if nodes_list_res.response:
-                        index = uids.index(item)
-                        hotkey = hotkeys[index]
-                        await self.create_node_detail(nodes_list_res.response, item, hotkey)
-                        
-                    else:
-                        logger.warning(f"Failed to get response from miner {item} after retry")
-                        index = uids.index(item)
-                        hotkey = hotkeys[index]
-                        node_detail = {
-                                    "ip": None,             # TEXT
-                                    "name": None,           # TEXT
-                                    "status": None,         # TEXT
-                                    "hotkey": None,         # TEXT
-                                    "certificate": None,    # TEXT
-                                    "usage_port": 0,        # INTEGER
-                                    "port": 0,              # INTEGER
-                        }
-                        
-                        node_value = {item: [node_detail]}
-                        upsert_data_in_node_detail(item, node_value) 
-            
-            node_info = get_all_data_in_node_detail()
-            print("node_info...", node_info)
+            logger.debug("uids... %s", uids)
+            if self.shard_coordinator is not None:
+                await self.shard_coordinator.run_cycle(uids)
+            else:
+                await self.collect_node_details(uids)
+                node_info = get_all_data_in_node_detail()
+                logger.debug("node_info... %s", node_info)
 
-            await self.fetch_score_and_resources_from_node(node_info)
+                await self.fetch_score_and_resources_from_node(node_info)
             await self.calculate_miners_scores_v2()
             logger.info("Node Details fetched successfully")
             return {"message": 'Node details fetched successfully', "success": True, "status": 200}
@@ -213,6 +368,32 @@ class Validator(BaseValidator):
             logger.error(f"Error in get_nodes_ip_and_status: {e}")
             return False
 
+    async def collect_node_details(self, uids):
+        """Discovers the nodes of the given uids, verifies their attestation and stores them in node_detail."""
+        uid_index = self.get_uid_index()
+        responses = await self.discover_due_miners(uids)
+        existing_nodes = get_node_detail_map()
+        attestations = await self.attest_nodes(responses)
+        for item in uids:
+            hotkey = uid_index[item][0]
+            if responses.get(item):
+                await self.create_node_detail(responses[item], item, hotkey, existing_nodes, attestations)
+
+            else:
+                logger.warning(f"Failed to get response from miner {item} after retry")
+                node_detail = {
+                            "ip": None,             # TEXT
+                            "name": None,           # TEXT
+                            "status": None,         # TEXT
+                            "hotkey": None,         # TEXT
+                            "certificate": None,    # TEXT
+                            "usage_port": 0,        # INTEGER
+                            "port": 0,              # INTEGER
+                }
+
+                node_value = {item: [node_detail]}
+                upsert_data_in_node_detail(item, node_value) 
+
     # def normalize_scores(self, miner_data):
     #     base_scores = {}
     #     error_rates = {}
@@ -245,103 +426,164 @@ class Validator(BaseValidator):
     #     return ranked_results
     
     def normalize_scores(self, miner_data):
-        base_scores = {}
-        error_rates = {}
-        adjusted_scores = {}
-
-        for data in miner_data:
-            # Unpack values and handle None values by replacing them with 0
-            id, miner_id, cpu_score, ram_score, disk_score, openai_tokens, groq_tokens, claude_tokens, gemini_tokens, total_requests, zero_value_entries = data
-
-            cpu_score = cpu_score if cpu_score is not None else 0
-            ram_score = ram_score if ram_score is not None else 0
-            disk_score = disk_score if disk_score is not None else 0
-            openai_tokens = openai_tokens if openai_tokens is not None else 0
-            groq_tokens = groq_tokens if groq_tokens is not None else 0
-            claude_tokens = claude_tokens if claude_tokens is not None else 0
-            gemini_tokens = gemini_tokens if gemini_tokens is not None else 0
-            total_requests = total_requests if total_requests is not None else 0
-            zero_value_entries = zero_value_entries if zero_value_entries is not None else 0
-
-            # Base score calculation
-            base_score = (
-                cpu_score * 0.1 + 
-                ram_score * 0.05 + 
-                disk_score * 0.05 +
-                groq_tokens * 0.25 + 
-                openai_tokens * 0.15 + 
-                claude_tokens * 0.15 + 
-                gemini_tokens * 0.25
-            )
-            base_scores[miner_id] = base_score
-
-            # Error rate calculation
-            error_rate = zero_value_entries / total_requests if total_requests > 0 else 0
-            error_rates[miner_id] = error_rate
-
-        # Adjust the scores using the provided method
-        adjusted_scores = self.calculate_adjustment(base_scores, error_rates)
-
-        # Normalize the adjusted scores
-        total_score = sum(adjusted_scores.values())
-        normalized_scores = {miner_id: score / total_score for miner_id, score in adjusted_scores.items() if total_score > 0}
-
-        # Rank the results
-        final_results = [(miner_id, score) for miner_id, score in normalized_scores.items()]
-        final_results.sort(key=lambda x: x[1], reverse=True)
-        ranked_results = [(miner_id, score, rank + 1) for rank, (miner_id, score) in enumerate(final_results)]
+        # Columnar scoring, see validators/scoring.py
+        return normalize_scores(miner_data)
+
+    def cached_verdict(self, ip, digest):
+        """Returns (send_report_res, verifier_data) of a report this node already served unchanged, or None."""
+        # Keyed by ip too: the verifier tied the cert to the node that served the report, a replay elsewhere must not hit
+        verdict = self.verdict_cache.get((ip, digest))
+        if verdict is None:
+            return None
+        logger.debug("Attestation report of %s unchanged, reusing cached verdict", ip)
+        return (verdict['status'], verdict['text']), {'cert': verdict['cert'], 'ip': ip}
+
+    def record_verdict(self, ip, digest, send_report_res):
+        """Reads the certificate the verifier stored for ip and caches a successful verdict."""
+        if send_report_res[0] is None:
+            return None
+        verifier_data = self.get_verifier_data(ip) # This method fetch the certificate from verifier
+        if send_report_res[0] == 200 and verifier_data:
+            self.verdict_cache.put((ip, digest), {'status': send_report_res[0], 'text': send_report_res[1], 'cert': verifier_data['cert']})
+        return verifier_data
+
+    async def verify_report(self, ip, ip_res):
+        """Verifies a node's attestation report, reusing the cached verdict of an unchanged report.
+
+        Returns (send_report_res, verifier_data) where verifier_data holds the certificate stored by the verifier.
+        """
+        digest = report_digest(ip_res)
+        cached = self.cached_verdict(ip, digest)
+        if cached is not None:
+            return cached
+
+        send_report_res = await self.send_report(ip_res)
+        return send_report_res, self.record_verdict(ip, digest, send_report_res)
+
+    async def attest_nodes(self, responses):
+        """Fetches the attestation reports of every discovered node and verifies them in verifier batches.
+
+        responses maps uid to the node list from discovery. Returns {(uid, ip): (ip_res, send_report_res, verifier_data)}
+        with ip_res None when the node did not serve a report.
+        """
+        semaphore = asyncio.Semaphore(max(1, self.discovery_concurrency))
+
+        async def fetch(item):
+            async with semaphore:
+                return await self.make_get_request(f"http://{item['ip']}:{item['port']}/report")
+
+        now = time.time()
+        keys = []
+        items = []
+        skipped = 0
+        for uid, nodes in responses.items():
+            if not nodes:
+                continue
+            # One miner's malformed GetNodeDetail answer must not take the other miners down with it
+            if not is_node_list(nodes):
+                logger.warning(f"Skipping miner {uid}: malformed node list from discovery")
+                continue
+            for item in nodes:
+                # Nodes backing off after recent failures get no entry and are skipped this cycle
+                if self.node_health.backing_off(uid, item['ip'], now):
+                    skipped += 1
+                    continue
+                keys.append((uid, item['ip']))
+                items.append(item)
+        if skipped:
+            logger.info(f"Skipping {skipped} nodes that are backing off after repeated failures")
+        reports = await asyncio.gather(*(fetch(item) for item in items), return_exceptions=True)
+
+        attestations = {}
+        pending = []
+        for key, ip_res in zip(keys, reports):
+            if isinstance(ip_res, Exception):
+                logger.error(f"Error fetching the attestation report of {key[1]}: {ip_res}")
+                ip_res = None
+            if ip_res is None:
+                self.node_health.record_failure(*key, now)
+                attestations[key] = (None, (None, None), None)
+                continue
+            digest = report_digest(ip_res)
+            cached = self.cached_verdict(key[1], digest)
+            if cached is not None:
+                attestations[key] = (ip_res,) + cached
+            else:
+                pending.append((key, ip_res, digest))
 
-        return ranked_results
+        if pending:
+            logger.info(f"Verifying {len(pending)} attestation reports, {len(keys) - len(pending)} reused or unavailable")
+            results = await self.attestation_client.send_reports_batch(
+                [ip_res for key, ip_res, digest in pending], chunk_size=self.verifier_batch_size
+            )
+            for (key, ip_res, digest), send_report_res in zip(pending, results):
+                attestations[key] = (ip_res, send_report_res, self.record_verdict(key[1], digest, send_report_res))
+        return attestations
 
-    async def create_node_detail(self, nodes, miner_uid, hotkey):
+    async def create_node_detail(self, nodes, miner_uid, hotkey, existing_nodes=None, attestations=None):
         try:
+            if existing_nodes is None:
+                existing_nodes = get_node_detail_map(miner_uid)
             for item in nodes:
                 item['miner_id'] = miner_uid
                 item['hotkey'] = hotkey
 
                 single_node_detail = {miner_uid: [item]}
-                miner_detail_exist = get_data_in_node_detail(item['miner_id'], item['ip'])
+                miner_detail_exist = existing_nodes.get((miner_uid, item['ip']))
                 # print("Miner detail exist...", miner_detail_exist)
                 # print("URL to get attestation...", f"http://{item['ip']}:{item['port']}/report")
-                ip_res = self.make_get_request(f"http://{item['ip']}:{item['port']}/report")
+                if attestations is not None and (miner_uid, item['ip']) in attestations:
+                    ip_res, send_report_res, verifier_data = attestations[(miner_uid, item['ip'])]
+                elif attestations is not None:
+                    logger.debug("Node %s is backing off, skipping it", item['ip'])
+                    continue
+                else:
+                    ip_res = await self.make_get_request(f"http://{item['ip']}:{item['port']}/report")
+                    if ip_res is not None:
+                        send_report_res, verifier_data = await self.verify_report(item['ip'], ip_res)
                 if ip_res is not None:
-                    send_report_res = self.send_report(ip_res)
-                    print("send report res....", send_report_res)
-                    
+                    logger.debug("send report res.... %s", send_report_res)
                     if send_report_res[0] is None:
-                        miner_node_detail = {'Validator_name': 'Validator-1.0', 'message':f'Attestation report failed for ip: {item["ip"]}'}
-                        syn = SendMinerScore(details=miner_node_detail)
-                        await self.query_miner(self.metagraph, miner_uid, syn)
+                        # The verifier did not answer, which says nothing about the node
+                        logger.warning(f"No verdict for {item['ip']} from the verifier, skipping it this cycle")
+                        continue
+                    
+                    if send_report_res[0] != 200:
+                        self.notifications.post(miner_uid, f'Attestation report failed for ip: {item["ip"]}')
                         return    
-                    verifier_data = self.get_verifier_data(item['ip']) # This method fetch the certificate from verifier
                 else:
-                    miner_node_detail = {'Validator_name': 'Validator-1.0', 'message':f'Server response failed for ip: {item["ip"]}'}
-                    syn = SendMinerScore(details=miner_node_detail)
-                    await self.query_miner(self.metagraph, miner_uid, syn)
+                    self.notifications.post(miner_uid, f'Server response failed for ip: {item["ip"]}')
                     return
 
+                if not verifier_data:
+                    # Verified, but the verifier's certificate for the node was not found in its db
+                    logger.warning(f"No verifier certificate found for {item['ip']}, skipping it this cycle")
+                    continue
+
+                # A verified node replaces the placeholder row written while its miner did not answer
+                if existing_nodes.pop((miner_uid, None), None) is not None:
+                    delete_node_detail_placeholder(miner_uid)
+
                 if miner_detail_exist is None and send_report_res[0] == 200:
 
                     single_node_detail[miner_uid][0]['certificate'] = verifier_data['cert']
-                    upsert_data_in_node_detail(miner_uid, single_node_detail)
+                    existing_nodes[(miner_uid, item['ip'])] = upsert_data_in_node_detail(miner_uid, single_node_detail)
+                    invalidate_pinned_certificate(item['ip'])
                     
                 elif miner_detail_exist is not None and send_report_res[0] == 200:
-                    print("miner_detail_exist...", miner_detail_exist)
+                    logger.debug("miner_detail_exist... %s", miner_detail_exist)
                     # id, name, status, ip, miner_id, hotkey, certificate = miner_detail_exist
                     id, name, status, ip, port, usage_port, miner_id, hotkey, certificate = miner_detail_exist
-                    if certificate == verifier_data['cert']:
-                        print("Certificate is same...")
+                    stored = (name, status, port, usage_port, hotkey, certificate)
+                    if stored == (item['name'], item['status'], item['port'], item['usage_port'], item['hotkey'], verifier_data['cert']):
+                        logger.debug("Node %s is unchanged...", ip)
                         continue
-                    else:
-                        print("Certificate is not same...")
-                        update_certificate_in_node_detail(miner_id, ip, verifier_data['cert'])
-                else:
-                    print("Verifier or attestation report Failed...")
-                    verifier_data = { "cert": None }  
-                    update_certificate_in_node_detail(miner_id, ip, verifier_data['cert'])
-                    continue
-            res = get_all_data_in_node_detail()
-            return res
+                    logger.debug("Node %s changed...", ip)
+                    single_node_detail[miner_uid][0]['certificate'] = verifier_data['cert']
+                    existing_nodes[(miner_uid, ip)] = upsert_data_in_node_detail(miner_uid, single_node_detail)
+                    if certificate != verifier_data['cert']:
+                        invalidate_pinned_certificate(ip)
+            return True
         except Exception as e:
             logger.error(f"Error in create_node_detail: {e}")
             return False
@@ -350,169 +592,197 @@ class Validator(BaseValidator):
         return node_detail.get(miner_id)
 
     def update_score_of_miner(self, node_info, miner_id):
-        miner_node_score = miner_data[miner_id]
-
-        cpu_score = node_info['benchmark_data']['CPU']['CPU Score']
-        ram_score = node_info['benchmark_data']['RAM']['RAM Score']
-        disk_score = node_info['benchmark_data']['Disk']['Disk Score']
-        open_ai = node_info['usage_summary']['openai']['total_tokens_last_12_hours']
-        groq = node_info['usage_summary']['groq']['total_tokens_last_12_hours']
-        claud = node_info['usage_summary']['gemini']['total_tokens_last_12_hours']
-        gemini = node_info['usage_summary']['claude']['total_tokens_last_12_hours']
-
-        update_ram_score = miner_node_score[2] + ram_score
-        update_cpu_score = miner_node_score[1] + cpu_score
-        update_disk_score = miner_node_score[3] + disk_score
-        update_openai_score = miner_node_score[4] + open_ai
-        update_groq_score = miner_node_score[5] + groq
-        update_claud_score = miner_node_score[6] + claud
-        update_gemini_score = miner_node_score[7] + gemini
-
-        miner_data[miner_id] = (miner_id, update_cpu_score, update_ram_score, update_disk_score, update_openai_score, update_groq_score, update_claud_score, update_gemini_score)
+        increments = self._increments
+        increments[:] = 0
+        increments[0] = node_info['benchmark_data']['CPU']['CPU Score']
+        increments[1] = node_info['benchmark_data']['RAM']['RAM Score']
+        increments[2] = node_info['benchmark_data']['Disk']['Disk Score']
+        increments[3] = node_info['usage_summary']['openai']['total_tokens_last_12_hours']
+        increments[4] = node_info['usage_summary']['groq']['total_tokens_last_12_hours']
+        increments[5] = node_info['usage_summary']['claude']['total_tokens_last_12_hours']
+        increments[6] = node_info['usage_summary']['gemini']['total_tokens_last_12_hours']
+        self.miner_table.add(miner_id, increments)
 
     def miner_id_exists(self, data, mid):
         return mid in data
 
     def get_data_by_miner_id(self, miner_id):
-        return miner_data.get(miner_id)
+        return self.miner_table.get(miner_id)
 
     def remove_tupple_score(miner_id):
         global normalized_score
         normalized_score = [t for t in normalized_score if t[0] != miner_id]
 
     async def fetch_node_score(self, session, url):
-        attempts = 3
-        for attempt in range(1, attempts + 1):
-            try:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.info(f"Attempt {attempt} failed with status code {response.status}. Retrying...")
-                        if attempt < attempts:
-                            await asyncio.sleep(2)
-            except Exception as e:
-                logger.info(f"Attempt {attempt} failed with error: {e}. Retrying...")
-                if attempt < attempts:
-                    await asyncio.sleep(2)
-        logger.info("** Error in fetch_node_score **: Max retries reached. Exiting.")
-        return None
-
-    async def process_node(self, item, session):
-        print("Node processing is in progress...")
-        
+        async def attempt():
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise AttemptFailed(f"status code {response.status}")
+                return await response.json()
+
+        try:
+            return await self.usage_policy.run(attempt, 'node_score')
+        except RequestFailed as e:
+            logger.info(f"** Error in fetch_node_score **: {e}")
+            return None
+
+    async def fetch_node_usage(self, item):
+        """Fetches token usage from a node. Returns (node_info, failure_message), one of them None."""
         uuid, name, status, ip, port, usage_port, miner_id, hotkey, certificate = item
-        print("Ip...", ip)
-        print("Port...", port)
-        # host = url.split("//")[1].split(":")[0]
-        # port = url.split("//")[1].split(":")[1]
-        retries = 3
-
-        if ip is not None and usage_port is not 0: 
-            for attempt in range(retries):
-                try:
-                    node_info = await api_fetch_token_usage(ip, usage_port)
-                    print("node_info...", node_info)
-                    
-                    if node_info:
-                        if 'hotkey' in node_info and node_info['hotkey'] != hotkey:
-                            node_info = None
-                            miner_node_detail = {'Validator_name': 'Validator-1.0', 'message':f'node {ip} hotkey mismatch'}
-                            syn = SendMinerScore(details=miner_node_detail)
-                            await self.query_miner(self.metagraph, miner_id, syn) 
-                            return
-                        else:
-                            break
-                except Exception as e:
-                    logger.error(f"Attempt {attempt + 1} failed: {str(e)}")
-                if attempt < retries - 1:
-                    await asyncio.sleep(2)  # Wait for 2 seconds before retrying
-            else:
-                logger.error(f"Failed to fetch token usage after {retries} attempts")
-                node_info = None
-        else:
-            node_info = None
+        logger.debug("Fetching usage from %s:%s", ip, usage_port)
 
-        if node_info is not None:
-            node_detail = {
-                "miner_id": miner_id,
-                "ip": ip,
-                "hotkey": hotkey,
-                "usage_summary": node_info['usage_summary'],
-            }
-            self.save_node_info_detail(node_detail)
+        if ip is None or usage_port == 0:
+            return None, 'Server response failed'
+
+        async def attempt():
+            node_info = await api_fetch_token_usage(ip, usage_port)
+            if not node_info:
+                raise AttemptFailed("empty token usage response")
+            return node_info
 
+        try:
+            node_info = await self.usage_policy.run(attempt, 'usage_fetch')
+        except RequestFailed as e:
+            logger.error(f"Failed to fetch token usage from {ip}: {e}")
+            return None, 'Server response failed'
+        logger.debug("node_info... %s", node_info)
+
+        if 'hotkey' in node_info and node_info['hotkey'] != hotkey:
+            return None, f'node {ip} hotkey mismatch'
+        return node_info, None
+
+    async def notify_miner_failure(self, miner_id, message):
+        logger.debug("Sending failed score to miner %s...", miner_id)
+        miner_node_detail = {'Validator_name': 'Validator-1.0', 'message': message}
+        syn = SendMinerScore(details=miner_node_detail)
+        await self.query_miner(self.metagraph, miner_id, syn)
+
+    async def process_node(self, item, session=None):
+        logger.debug("Node processing is in progress...")
+        node_info, failure = await self.fetch_node_usage(item)
+        if failure is not None:
+            self.notifications.post(item[6], failure)
+        self.record_node_health(item, node_info)
+        self.apply_node_result(item, node_info)
+
+    def record_node_health(self, item, node_info):
+        """Resets the backoff of a node that answered, or extends it when it did not."""
+        ip, miner_id = item[3], item[6]
+        if ip is None:
+            return
         if node_info is not None:
-            print("Calculating node info...")
-            existing_miner_data = miner_data_get_one(miner_id)
-            print("existing_miner_data...", existing_miner_data)
-            print("miner_id...",   miner_id)
-            if existing_miner_data:
-                id, miner_id, cpu_score, ram_score, disk_score, openai_tokens, groq_tokens, claude_tokens, gemini_tokens, total_requests, zero_value_entries = existing_miner_data[0]
-                print("id...", id)
-                print("miner_id...", miner_id)
-                print("cpu_score...", cpu_score)
-                print("ram_score...", ram_score)
-                print("disk_score...", disk_score)
-                print("openai_tokens...", openai_tokens)
-                print("groq_tokens...", groq_tokens)
-                print("claude_tokens...", claude_tokens)
-                print("gemini_tokens...", gemini_tokens)
-                print("total_requests...", total_requests)
-                print("zero_value_entries...", zero_value_entries)
-
-                cpu_score += node_info['benchmark_data']['CPU']['CPU Score']
-                ram_score += node_info['benchmark_data']['RAM']['RAM Score']
-                disk_score += node_info['benchmark_data']['Disk']['Disk Score']
-
-                openai_tokens += node_info['usage_summary']['openai']['total_tokens_last_24_hours']
-                groq_tokens += node_info['usage_summary']['groq']['total_tokens_last_24_hours']
-                claude_tokens += node_info['usage_summary']['claude']['total_tokens_last_24_hours']
-                gemini_tokens += node_info['usage_summary']['gemini']['total_tokens_last_24_hours']
-
-                total_requests += sum(api['total_requests_last_24_hours'] for api in node_info['usage_summary'].values())
-                zero_value_entries += sum(api['zero_value_entries_last_24_hours'] for api in node_info['usage_summary'].values())
-
-                miner_data[miner_id] = (miner_id, cpu_score, ram_score, disk_score, openai_tokens, groq_tokens, claude_tokens, gemini_tokens, total_requests, zero_value_entries)
-                print("Accumlated sum of miner data...", miner_data[miner_id])
-                miner_score_res = insert_data_in_miner_data(miner_id, miner_data[miner_id])
-                logger.info(f"Miner score res: {miner_score_res}")
-            else: 
-                # id, miner_id, cpu_score, ram_score, disk_score, openai_tokens, groq_tokens, claude_tokens, gemini_tokens, total_requests, zero_value_entries = existing_miner_data
-                cpu_score = node_info['benchmark_data']['CPU']['CPU Score']
-                ram_score = node_info['benchmark_data']['RAM']['RAM Score']
-                disk_score = node_info['benchmark_data']['Disk']['Disk Score']
-
-                openai_tokens = node_info['usage_summary']['openai']['total_tokens_last_24_hours']
-                groq_tokens = node_info['usage_summary']['groq']['total_tokens_last_24_hours']
-                claude_tokens = node_info['usage_summary']['claude']['total_tokens_last_24_hours']
-                gemini_tokens = node_info['usage_summary']['gemini']['total_tokens_last_24_hours']
-
-                total_requests = sum(api['total_requests_last_24_hours'] for api in node_info['usage_summary'].values())
-                zero_value_entries = sum(api['zero_value_entries_last_24_hours'] for api in node_info['usage_summary'].values())
-
-                miner_data[miner_id] = (miner_id, cpu_score, ram_score, disk_score, openai_tokens, groq_tokens, claude_tokens, gemini_tokens, total_requests, zero_value_entries)
-                miner_score_res = insert_data_in_miner_data(miner_id, miner_data[miner_id])
-                logger.info(f"Miner score res: {miner_score_res}")
+            self.node_health.record_success(miner_id, ip)
         else:
+            self.node_health.record_failure(miner_id, ip)
+
+    def flush_node_health(self):
+        upserts, deletes = self.node_health.changes()
+        if upserts or deletes:
+            save_node_health(upserts, deletes)
+            logger.info(f"Persisted node health: {len(upserts)} nodes failing, {len(deletes)} recovered")
+
+    def node_increments(self, node_info, increments):
+        """Fills increments with what a node's usage adds to its miner's totals, in VALUE_COLUMNS order."""
+        usage_summary = node_info['usage_summary']
+        increments[0] = node_info['benchmark_data']['CPU']['CPU Score']
+        increments[1] = node_info['benchmark_data']['RAM']['RAM Score']
+        increments[2] = node_info['benchmark_data']['Disk']['Disk Score']
+        increments[3] = usage_summary['openai']['total_tokens_last_24_hours']
+        increments[4] = usage_summary['groq']['total_tokens_last_24_hours']
+        increments[5] = usage_summary['claude']['total_tokens_last_24_hours']
+        increments[6] = usage_summary['gemini']['total_tokens_last_24_hours']
+        increments[7] = sum(api['total_requests_last_24_hours'] for api in usage_summary.values())
+        increments[8] = sum(api['zero_value_entries_last_24_hours'] for api in usage_summary.values())
+        return increments
+
+    def apply_node_result(self, item, node_info):
+        """Accumulates a node's usage into its miner's in-memory totals."""
+        uuid, name, status, ip, port, usage_port, miner_id, hotkey, certificate = item
 
-            print("Sending failed score to miner...")
-            miner_node_detail = {'Validator_name': 'Validator-1.0', 'message':'Server response failed'}
-            syn = SendMinerScore(details=miner_node_detail)
-            await self.query_miner(self.metagraph, miner_id, syn) 
-
+        if node_info is not None:
+            logger.debug("Calculating node info...")
+            increments = self.node_increments(node_info, self._increments)
+            self.apply_node_usage(miner_id, ip, hotkey, increments, compact_usage(node_info['usage_summary']))
+
+    def apply_node_usage(self, miner_id, ip, hotkey, increments, usage):
+        """Records a node's compact usage and adds its increments to the miner's totals."""
+        self.usage_history.record_compact(miner_id, ip, hotkey, usage)
+        self.miner_table.add(miner_id, increments)
+        logger.debug("Accumlated sum of miner data... %s", self.miner_table.get(miner_id))
+        self.updated_miners.add(miner_id)
+
+    def load_miner_data(self):
+        """Loads the persisted miner_data rows into the in-memory accumulator."""
+        self.miner_table.load(miner_data_get_all() or [])
+        self.updated_miners = set()
+
+    def flush_miner_data(self):
+        """Writes every miner updated during the stage in one transaction."""
+        if self.updated_miners:
+            bulk_upsert_miner_data(self.miner_table.rows(self.updated_miners))
+            logger.info(f"Persisted miner data for {len(self.updated_miners)} miners")
+        self.updated_miners = set()
+
+    async def score_worker(self, queue, results):
+        """Pulls nodes from the queue until cancelled, fetching each within the per-node timeout."""
+        while True:
+            item = await queue.get()
+            try:
+                logger.debug("Item... %s", item)
+                try:
+                    node_info, failure = await asyncio.wait_for(self.fetch_node_usage(item), timeout=self.node_timeout)
+                except asyncio.TimeoutError:
+                    logger.error(f"Fetching usage from node {item[3]} timed out after {self.node_timeout}s")
+                    node_info, failure = None, 'Server response failed'
+                except Exception as e:
+                    logger.error(f"Error fetching usage from node {item[3]}: {e}")
+                    node_info, failure = None, 'Server response failed'
+                results.put_nowait((item, node_info))
+                self.record_node_health(item, node_info)
+                if failure is not None:
+                    self.notifications.post(item[6], failure)
+            finally:
+                queue.task_done()
+
+    async def persist_node_results(self, results):
+        """Applies node results to the miner accumulator as they complete."""
+        while True:
+            result = await results.get()
+            if result is None:
+                break
+            try:
+                self.apply_node_result(*result)
+            except Exception as e:
+                logger.error(f"Error applying result of node {result[0][3]}: {e}")
 
     async def get_node_score(self, node_info):
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for item in node_info:
-                print("Item...", item)
-                tasks.append(self.process_node(item, session))
-                if len(tasks) >= 20:
-                    await asyncio.gather(*tasks)
-                    tasks = []
-            if tasks:
-                await asyncio.gather(*tasks)
+        # Loaded once, the table is kept current by the running totals and deregistration drops
+        if not self.miner_table.loaded:
+            self.load_miner_data()
+        queue = asyncio.Queue()
+        results = asyncio.Queue()
+        now = time.time()
+        skipped = 0
+        for item in node_info:
+            if item[3] is not None and self.node_health.backing_off(item[6], item[3], now):
+                skipped += 1
+                continue
+            queue.put_nowait(item)
+        if skipped:
+            logger.info(f"Skipping usage fetch of {skipped} nodes that are backing off")
+
+        workers = [asyncio.create_task(self.score_worker(queue, results)) for _ in range(min(self.score_workers, queue.qsize()))]
+        persister = asyncio.create_task(self.persist_node_results(results))
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            results.put_nowait(None)
+            await persister
+            self.flush_miner_data()
+            self.flush_node_health()
 
     def update_normalized_score(self, final_result):
         global normalized_score
@@ -529,69 +799,19 @@ class Validator(BaseValidator):
                 insert_data_in_normalized_score(new_tuple[0], str(new_tuple))
 
 
-    def make_get_request(self, url, params=None, max_retries=3, retry_delay=2):
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(url, params=params)
-
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    logging.warning(f"Request failed with status code {response.status_code} (Attempt {attempt + 1}/{max_retries})")
-
-            except RequestException as e:
-                logging.error(f"Request error occurred: {e} (Attempt {attempt + 1}/{max_retries})")
-
-            if attempt < max_retries - 1:
-                logging.info(f"Retrying in {retry_delay} seconds...")
-                sleep(retry_delay)
+    async def make_get_request(self, url, params=None):
+        return await self.attestation_client.fetch_report(url, params=params)
 
-        logging.error(f"Request failed after {max_retries} attempts")
-        return None
-
-    def send_report(self, ip_res, max_retries=3, retry_delay=2):
-        url = "http://localhost:8080/report"
-        headers = {"Content-Type": "application/json"}
-
-        for attempt in range(max_retries):
-            try:
-                response = requests.post(url, headers=headers, json=ip_res)
-                response.raise_for_status()
-                return response.status_code, response.text
-            except RequestException as e:
-                logger.error(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
-                if attempt < max_retries - 1:
-                    sleep(retry_delay)
-
-        logger.error(f"Request failed after {max_retries} attempts")
-        return None, None   
+    async def send_report(self, ip_res):
+        return await self.attestation_client.send_report(ip_res)
 
     def calculate_adjustment(self, base_scores, error_rates):
-        adjusted_scores = {}
-        max_error_rate = max(error_rates.values())
-
-        for miner_id, base_score in base_scores.items():
-            error_rate = error_rates[miner_id]
-
-            if error_rate > 0.1:
-                adjustment = 1 - (error_rate - 0.1) * 2
-            elif 0.02 <= error_rate <= 0.1:
-                adjustment = 1
-            else:
-                if max_error_rate > 0.1:
-                    adjustment = 1 + (0.02 - error_rate) / 0.02 * 0.1
-                else:
-                    adjustment = 1
-
-            adjusted_score = base_score * adjustment
-
-            if max_error_rate > 0:
-                relative_error = error_rate / max_error_rate
-                adjusted_score *= (1 + (0.5 - relative_error))
-
-            adjusted_scores[miner_id] = adjusted_score
-
-        return adjusted_scores
+        miner_ids = list(base_scores)
+        adjusted = adjust_scores(
+            np.array([base_scores[miner_id] for miner_id in miner_ids], dtype=np.float64),
+            np.array([error_rates[miner_id] for miner_id in miner_ids], dtype=np.float64),
+        )
+        return dict(zip(miner_ids, adjusted.tolist()))
 
     def get_node_list(self):
         logger.info("Request made to fetch node details and calculate score per miner")
@@ -599,36 +819,11 @@ class Validator(BaseValidator):
             response = node_detail
             return response
         except Exception as e:
-            print(f"An error occurred: {e}")
+            logger.error(f"An error occurred: {e}")
             
     def save_node_info_detail(self, node_detail):
         try:
-            global node_info_usage_detail
-            miner_id = node_detail['miner_id']
-            node_ip = node_detail['ip']
-
-            if miner_id in node_info_usage_detail:
-                existing_ips = [node['node_ip'] for node in node_info_usage_detail[miner_id]['node_details']]
-                print("**-- existing_ips --**", existing_ips)
-                if node_ip in existing_ips:
-                    node_info_usage_detail[miner_id]['node_details'].append(
-                        {
-                            "node_ip": node_detail['ip'],
-                            "hotkey": node_detail['hotkey'],
-                            "usage_summary": node_detail['usage_summary'],
-                        }
-                    )
-            else:
-                node_info_usage_detail[miner_id] = {
-                    "node_details": [
-                        {
-                            "node_ip": node_detail['ip'],
-                            "hotkey": node_detail['hotkey'],
-                            "usage_summary": node_detail['usage_summary'],
-                        }
-                    ]
-                }
-                return True
+            self.usage_history.record(node_detail['miner_id'], node_detail['ip'], node_detail['hotkey'], node_detail['usage_summary'])
             return True
         except Exception as e:
             logger.error(f"Error in save_node_info_detail: {e}")
@@ -636,47 +831,21 @@ class Validator(BaseValidator):
         
     def get_node_info_usage_detail(self):
         try:
-            return node_info_usage_detail
+            return self.usage_history.to_dict()
         except Exception as e:
             logger.error(f"Error in get_node_info_usage_detail: {e}")
             return False
 
     def get_verifier_data(self, search_ip):
         try:
-            print(f"Searching for IP: {search_ip}")
-            
-            with open(self.db_path, 'r') as file:
-                content = file.read()
-            
-            # Split the content into individual JSON objects
-            json_objects = content.replace('}{', '}\n{').split('\n')
-            
-            # Parse each JSON object and store in a list
-            data = []
-            matching_object = None
-            for obj in json_objects:
-                try:
-                    parsed_obj = json.loads(obj)
-                    if parsed_obj['ip'] == search_ip:
-                        matching_object = parsed_obj
-                        print(f"Found matching IP. Certificate:\n{matching_object['cert']}")
-                    else:
-                        data.append(parsed_obj)
-                except json.JSONDecodeError as json_err:
-                    logger.warning(f"Error parsing JSON object: {json_err}")
-                    logger.warning(f"Problematic JSON: {obj}")
-            
+            logger.debug("Searching for IP: %s", search_ip)
+            matching_object = self.cert_store.consume(search_ip)
             if matching_object:
-                # Write the updated data back to the file
-                with open(self.db_path, 'w') as file:
-                    for item in data:
-                        json.dump(item, file)
-                        file.write('\n')
-                print(f"Object with IP {search_ip} has been deleted from db.json")
+                logger.debug("Found matching IP. Certificate:\n%s", matching_object['cert'])
                 return matching_object
             else:
-                print(f"No matching IP found for {search_ip}")
+                logger.debug("No matching IP found for %s", search_ip)
                 return None
         except Exception as e:
             logger.error(f"Error in get_verifier_data: {str(e)}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,197 @@
+import codecs
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger('colorful_logger')
+
+# Seconds a replaced file is watched for rows the verifier was still appending when it was swapped out
+RETIRED_WATCH_SECONDS = 60
+
+
+class VerifierCertStore:
+    """IP index over the append-only db.json written by the attestation verifier.
+
+    The verifier appends one {"cert", "ip"} object per verified report. New bytes are
+    parsed incrementally, consumed entries are tombstoned in memory and the file is only
+    rewritten once enough tombstones have accumulated. A compact_threshold of None never
+    rewrites it, for readers that share the file with the one store allowed to compact it.
+    The verifier takes no lock, so a row it appends to the old file around the swap is
+    copied into the new one.
+    """
+
+    def __init__(self, path, compact_threshold=256):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        # (open file, bytes already carried over, watch deadline) of the file the last compaction replaced
+        self._retired = None
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._identity = None
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._entries = []
+        self._index = {}
+        self._tombstones = 0
+
+    def _add_entry(self, entry):
+        ip = entry.get('ip') if isinstance(entry, dict) else None
+        if ip is None:
+            logger.warning(f"Ignoring verifier entry without ip: {entry}")
+            return
+        self._index.setdefault(ip, []).append(len(self._entries))
+        self._entries.append(entry)
+
+    def _parse_buffer(self):
+        decoder = json.JSONDecoder()
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos >= len(buffer):
+                break
+            try:
+                entry, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Either a partially written object at the tail or a corrupt one followed by more objects
+                next_start = buffer.find('{', pos + 1)
+                while next_start != -1:
+                    try:
+                        decoder.raw_decode(buffer, next_start)
+                        break
+                    except json.JSONDecodeError:
+                        next_start = buffer.find('{', next_start + 1)
+                if next_start == -1:
+                    break
+                logger.warning(f"Problematic JSON: {buffer[pos:next_start]}")
+                pos = next_start
+                continue
+            self._add_entry(entry)
+            pos = end
+        self._buffer = buffer[pos:]
+
+    def refresh(self):
+        """Indexes the entries appended since the last call."""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        if self._retired is not None:
+            self._carry_over()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            return
+        identity = (stat.st_dev, stat.st_ino)
+        size = stat.st_size
+        if identity != self._identity or size < self._offset:
+            # The file was replaced by a compaction or truncated, start over
+            self._reset()
+            self._identity = identity
+        if size == self._offset:
+            return
+        with open(self.path, 'rb') as file:
+            file.seek(self._offset)
+            chunk = file.read(size - self._offset)
+        self._offset += len(chunk)
+        self._buffer += self._decoder.decode(chunk)
+        self._parse_buffer()
+
+    def consume(self, ip):
+        """Returns the latest entry for ip and tombstones every entry stored for it."""
+        with self._lock:
+            self._refresh()
+            match = self._tombstone(ip)
+            self._maybe_compact()
+            return match
+
+    def discard(self, ips):
+        """Tombstones every entry stored for ips, which another reader of the file consumed."""
+        with self._lock:
+            self._refresh()
+            for ip in ips:
+                self._tombstone(ip)
+            self._maybe_compact()
+
+    def _tombstone(self, ip):
+        positions = self._index.pop(ip, None)
+        if not positions:
+            return None
+        match = self._entries[positions[-1]]
+        for position in positions:
+            self._entries[position] = None
+        self._tombstones += len(positions)
+        return match
+
+    def _maybe_compact(self):
+        if self.compact_threshold is not None and self._tombstones >= self.compact_threshold:
+            self._compact()
+
+    def compact(self):
+        """Rewrites the file with only the live entries."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        self._refresh()
+        tmp_path = f"{self.path}.{os.getpid()}.compact"
+        for _ in range(3):
+            live = [entry for entry in self._entries if entry is not None]
+            with open(tmp_path, 'w') as file:
+                for entry in live:
+                    json.dump(entry, file)
+                    file.write('\n')
+                file.write(self._buffer)
+            # Held open so rows appended to the old file from here on can still be read after the swap
+            old = open(self.path, 'rb')
+            # Skip the swap if the verifier appended while the live set was being written
+            if os.fstat(old.fileno()).st_size != self._offset:
+                old.close()
+                self._refresh()
+                continue
+            written = os.stat(tmp_path)
+            os.replace(tmp_path, self.path)
+            self._retire(old, self._offset)
+            pending = self._buffer
+            self._reset()
+            # Rows appended to the new file right after the swap are past this offset and read by the next refresh
+            self._offset = written.st_size
+            self._identity = (written.st_dev, written.st_ino)
+            for entry in live:
+                self._add_entry(entry)
+            self._buffer = pending
+            logger.info(f"Compacted verifier db to {len(live)} entries")
+            self._carry_over()
+            return
+        os.remove(tmp_path)
+        logger.warning("Verifier db kept changing during compaction, will retry later")
+
+    def _retire(self, file, offset):
+        if self._retired is not None:
+            self._retired[0].close()
+        self._retired = (file, offset, time.monotonic() + RETIRED_WATCH_SECONDS)
+
+    def _carry_over(self):
+        """Appends to the current file the rows the verifier wrote to the replaced one after the swap."""
+        file, offset, deadline = self._retired
+        file.seek(offset)
+        extra = file.read()
+        if extra:
+            with open(self.path, 'ab') as current:
+                current.write(extra)
+            logger.info(f"Carried {len(extra)} bytes appended during compaction over to the verifier db")
+            self._retired = (file, offset + len(extra), deadline)
+        elif time.monotonic() >= deadline:
+            file.close()
+            self._retired = None
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(positions) for positions in self._index.values())
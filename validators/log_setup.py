@@ -0,0 +1,76 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+from colorama import Fore, Style, init
+
+LOGGER_NAME = 'colorful_logger'
+
+# Define the log format
+log_format = "%(asctime)s |     %(levelname)s     | %(message)s"
+level_colors = {
+    logging.DEBUG: Fore.BLUE,
+    logging.INFO: Fore.GREEN,
+    logging.WARNING: Fore.YELLOW,
+    logging.ERROR: Fore.RED,
+    logging.CRITICAL: Fore.RED + Style.BRIGHT,
+}
+
+_listener = None
+_queue_handler = None
+
+
+class ColorFormatter(logging.Formatter):
+    """Colours each record by level, using one formatter per level built up front."""
+
+    def __init__(self, fmt=log_format):
+        super().__init__(fmt)
+        self._formatters = {
+            level: logging.Formatter(color + fmt + Style.RESET_ALL) for level, color in level_colors.items()
+        }
+
+    def format(self, record):
+        formatter = self._formatters.get(record.levelno)
+        if formatter is None:
+            return super().format(record)
+        return formatter.format(record)
+
+
+def setup_logging(level=None):
+    """Configures the colorful_logger and returns it. Safe to call again to change the level.
+
+    Records are put on a queue and written to the console by a listener thread, so the event
+    loop never blocks on log I/O. The level defaults to DAASI_LOG_LEVEL or INFO; debug records
+    are discarded before their message is formatted.
+    """
+    global _listener, _queue_handler
+    logger = logging.getLogger(LOGGER_NAME)
+    if level is None:
+        level = os.environ.get('DAASI_LOG_LEVEL', 'INFO')
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+    if _listener is None:
+        init()
+        console = logging.StreamHandler()
+        console.setFormatter(ColorFormatter())
+        log_queue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        logger.addHandler(_queue_handler)
+        # Records are written once by the listener, not again by handlers on the root logger
+        logger.propagate = False
+        _listener = logging.handlers.QueueListener(log_queue, console, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    return logger
+
+
+def stop_logging():
+    """Writes out the queued records and stops the listener thread."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        logging.getLogger(LOGGER_NAME).removeHandler(_queue_handler)
+        _listener.stop()
+        _listener = None
+        _queue_handler = None
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from collections import namedtuple
+
+logger = logging.getLogger('colorful_logger')
+
+# added and removed are lists of uids, changed is a list of (uid, old_hotkey, new_hotkey)
+MetagraphDiff = namedtuple('MetagraphDiff', ['added', 'removed', 'changed'])
+
+
+def hotkeys_by_uid(metagraph):
+    return {int(uid): hotkey for uid, hotkey in zip(metagraph.uids.tolist(), metagraph.hotkeys)}
+
+
+def diff_hotkeys(old, new):
+    """Compares two {uid: hotkey} snapshots."""
+    added = [uid for uid in new if uid not in old]
+    removed = [uid for uid in old if uid not in new]
+    changed = [(uid, old[uid], hotkey) for uid, hotkey in new.items() if uid in old and old[uid] != hotkey]
+    return MetagraphDiff(added, removed, changed)
+
+
+class MetagraphCache:
+    """Single shared metagraph, resynced every refresh_blocks blocks or refresh_seconds seconds.
+
+    Listeners registered with add_listener receive a MetagraphDiff whenever a resync adds,
+    removes or re-registers uids. version increases on every resync so callers can rebuild
+    anything derived from the metagraph. A resync builds a new metagraph and swaps it in, the
+    one in use is never changed in place, so readers on the event loop always see one sync.
+    """
+
+    def __init__(self, subtensor, netuid, metagraph=None, refresh_blocks=100, refresh_seconds=20 * 60):
+        self.subtensor = subtensor
+        self.netuid = netuid
+        self.refresh_blocks = refresh_blocks
+        self.refresh_seconds = refresh_seconds
+        self.metagraph = metagraph if metagraph is not None else subtensor.metagraph(netuid)
+        self.version = 0
+        self.synced_at = time.monotonic()
+        self.synced_block = self._block_of(self.metagraph)
+        self._hotkeys = hotkeys_by_uid(self.metagraph)
+        self._listeners = []
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _block_of(metagraph):
+        block = getattr(metagraph, 'block', None)
+        return int(block) if block is not None else None
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def due(self):
+        """True when the configured number of seconds or blocks passed since the last sync."""
+        if time.monotonic() - self.synced_at >= self.refresh_seconds:
+            return True
+        if self.refresh_blocks and self.synced_block is not None:
+            return self.subtensor.get_current_block() - self.synced_block >= self.refresh_blocks
+        return False
+
+    def _fetch(self):
+        """Returns a newly synced metagraph, blocking on the chain."""
+        return self.subtensor.metagraph(self.netuid)
+
+    def _synced(self):
+        self.synced_at = time.monotonic()
+        self.synced_block = self._block_of(self.metagraph)
+        hotkeys = hotkeys_by_uid(self.metagraph)
+        diff = diff_hotkeys(self._hotkeys, hotkeys)
+        self._hotkeys = hotkeys
+        self.version += 1
+        logger.info(
+            f"Metagraph synced at block {self.synced_block}: {len(diff.added)} added, "
+            f"{len(diff.removed)} removed, {len(diff.changed)} hotkeys changed"
+        )
+        return diff
+
+    def _notify(self, diff):
+        if not (diff.added or diff.removed or diff.changed):
+            return
+        for listener in self._listeners:
+            try:
+                listener(diff)
+            except Exception as e:
+                logger.error(f"Error in metagraph listener: {e}")
+
+    def replace(self, metagraph):
+        """Swaps in a metagraph synced elsewhere and notifies listeners of the changes."""
+        self.metagraph = metagraph
+        diff = self._synced()
+        self._notify(diff)
+        return diff
+
+    def refresh(self):
+        """Resyncs the metagraph from the chain and notifies listeners of the changes."""
+        return self.replace(self._fetch())
+
+    async def maybe_refresh(self):
+        """Resyncs when due, with the chain calls off the event loop. Returns the MetagraphDiff or None."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            try:
+                if not await loop.run_in_executor(None, self.due):
+                    return None
+                metagraph = await loop.run_in_executor(None, self._fetch)
+            except Exception as e:
+                logger.error(f"Error refreshing metagraph: {e}")
+                return None
+            # Swapped in and listeners run on the event loop thread, they may touch the SQLite connection
+            return self.replace(metagraph)
@@ -0,0 +1,225 @@
+import bisect
+import math
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from a local SQLite write up to a slow miner over the internet
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        for key, value in sorted(self._values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def merge(self, values):
+        for key, amount in values.items():
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # Per-bucket (non cumulative) counts, then sum and count
+            state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def merge(self, values):
+        for key, (counts, total, count) in values.items():
+            state = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            state[0] = [mine + theirs for mine, theirs in zip(state[0], counts)]
+            state[1] += total
+            state[2] += count
+
+    def _samples(self):
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))]), cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class Registry:
+    """Holds the validator's metrics and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def drain(self):
+        """Returns the counter and histogram values recorded since the last call and clears them.
+
+        Meant for merge() into the registry of another process, gauges are point in time and left out.
+        """
+        snapshot = {}
+        for name, metric in self._metrics.items():
+            if isinstance(metric, (Counter, Histogram)) and metric._values:
+                snapshot[name] = metric._values
+                metric._values = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Adds the values of a drain() snapshot taken in another process to the metrics of the same name."""
+        for name, values in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge(values)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    'validator_stage_duration_seconds', 'Latency of one operation of a validation stage.', ('stage',)
+)
+STAGE_RESULTS = REGISTRY.counter(
+    'validator_stage_results_total', 'Operations of a validation stage by outcome.', ('stage', 'outcome')
+)
+STAGE_RETRIES = REGISTRY.counter(
+    'validator_stage_retries_total', 'Retried attempts of a validation stage.', ('stage',)
+)
+STAGE_HEDGES = REGISTRY.counter(
+    'validator_stage_hedged_total', 'Second requests sent because the first was slower than usual.', ('stage',)
+)
+STAGE_IN_FLIGHT = REGISTRY.gauge(
+    'validator_stage_in_flight', 'Operations of a validation stage currently running.', ('stage',)
+)
+
+
+class StageResult:
+    """Handed out by track(); call fail() when the operation failed without raising."""
+
+    __slots__ = ('failed',)
+
+    def __init__(self):
+        self.failed = False
+
+    def fail(self):
+        self.failed = True
+
+
+@contextmanager
+def track(stage):
+    """Times one operation of a stage and counts its outcome. An exception counts as a failure."""
+    result = StageResult()
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    start = time.perf_counter()
+    try:
+        yield result
+    except BaseException:
+        result.failed = True
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+        STAGE_RESULTS.inc(stage=stage, outcome='failure' if result.failed else 'success')
+
+
+def count_retry(stage, amount=1):
+    STAGE_RETRIES.inc(amount, stage=stage)
+
+
+def count_hedge(stage, amount=1):
+    STAGE_HEDGES.inc(amount, stage=stage)
+
+
+def render():
+    """Returns every registered metric in the Prometheus text exposition format."""
+    return REGISTRY.render()
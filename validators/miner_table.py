@@ -0,0 +1,162 @@
+import numpy as np
+
+from validators.scoring import (
+    MINER_COLUMNS, adjust_scores, base_scores, error_rates, miner_rows_to_columns, rank_scores,
+)
+
+# Accumulated columns, in miner_data table order after miner_id
+VALUE_COLUMNS = MINER_COLUMNS[1:]
+
+
+class MinerTable:
+    """Column-oriented accumulator of per-miner totals, one slot per uid.
+
+    values keeps one contiguous row per VALUE_COLUMNS entry and one column per slot, the layout
+    score_columns takes, so columns() hands views of the live arrays to the scoring step.
+
+    Each slot's base score and error rate are recomputed from its totals whenever they change, and
+    the largest error rate is kept as a running aggregate, so ranking() only has to apply the
+    adjustment and sort. Totals must only change through add(), load() and remove().
+    """
+
+    def __init__(self, capacity=256):
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.values = np.zeros((len(VALUE_COLUMNS), capacity))
+        self.base = np.zeros(capacity)
+        self.rates = np.zeros(capacity)
+        self.size = 0
+        self.slots = {}
+        self.loaded = False
+        self._max_error_rate = 0.0
+        self._max_stale = False
+        self._ranking = None
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, uid):
+        return uid in self.slots
+
+    def _allocate(self, capacity):
+        ids = np.empty(capacity, dtype=np.int64)
+        values = np.zeros((len(VALUE_COLUMNS), capacity))
+        base = np.zeros(capacity)
+        rates = np.zeros(capacity)
+        ids[:self.size] = self.ids[:self.size]
+        values[:, :self.size] = self.values[:, :self.size]
+        base[:self.size] = self.base[:self.size]
+        rates[:self.size] = self.rates[:self.size]
+        self.ids, self.values, self.base, self.rates = ids, values, base, rates
+
+    def slot(self, uid):
+        """Returns the slot of uid, adding a zeroed one for a new uid."""
+        slot = self.slots.get(uid)
+        if slot is None:
+            if self.size == len(self.ids):
+                self._allocate(max(1, 2 * len(self.ids)))
+            slot = self.size
+            self.ids[slot] = uid
+            self.values[:, slot] = 0
+            self.base[slot] = 0
+            self.rates[slot] = 0
+            self.slots[uid] = slot
+            self.size += 1
+            self._ranking = None
+        return slot
+
+    def _rescore(self, slot):
+        """Recomputes the base score and error rate of one slot with the same formulas as scoring.py."""
+        # Plain floats, the per-slot arithmetic is the same as the vectorized one and much cheaper
+        totals = self.values[:, slot].tolist()
+        self.base[slot] = base_scores(totals)
+        total_requests, zero_value_entries = totals[7], totals[8]
+        rate = zero_value_entries / total_requests if total_requests > 0 else 0.0
+        old_rate = self.rates[slot]
+        self.rates[slot] = rate
+        if rate >= self._max_error_rate:
+            self._max_error_rate = rate
+        elif old_rate == self._max_error_rate:
+            # The slot holding the maximum went down, find the new maximum when it is next needed
+            self._max_stale = True
+        self._ranking = None
+
+    def add(self, uid, increments):
+        """Adds one value per VALUE_COLUMNS entry to the totals of uid, in place."""
+        slot = self.slot(uid)
+        self.values[:, slot] += increments
+        self._rescore(slot)
+
+    def get(self, uid):
+        """Returns (miner_id, cpu_score, ..., zero_value_entries) of uid, or None."""
+        slot = self.slots.get(uid)
+        if slot is None:
+            return None
+        return (uid, *self.values[:, slot].tolist())
+
+    def rows(self, uids):
+        """Returns the miner_data tuples of the given uids that are in the table."""
+        return [self.get(uid) for uid in uids if uid in self.slots]
+
+    def columns(self):
+        """Returns (miner_ids, values) views over the filled slots, without copying."""
+        return self.ids[:self.size], self.values[:, :self.size]
+
+    @property
+    def max_error_rate(self):
+        if self._max_stale:
+            self._max_error_rate = float(self.rates[:self.size].max()) if self.size else 0.0
+            self._max_stale = False
+        return self._max_error_rate
+
+    def ranking(self):
+        """Returns the (miner_ids, scores, ranks) arrays score_columns would, cached until the totals change."""
+        if self._ranking is None:
+            miner_ids = self.ids[:self.size]
+            adjusted = adjust_scores(self.base[:self.size], self.rates[:self.size], self.max_error_rate)
+            # rank_scores indexes miner_ids, so the result holds copies and not views of the table
+            self._ranking = rank_scores(miner_ids, adjusted)
+        return self._ranking
+
+    def _rescore_all(self):
+        _, values = self.columns()
+        self.base[:self.size] = base_scores(values)
+        self.rates[:self.size] = error_rates(values)
+        self._max_stale = True
+        self._ranking = None
+
+    def load(self, miner_data):
+        """Replaces the table with miner_data rows as read from SQLite."""
+        miner_ids, values = miner_rows_to_columns(miner_data)
+        self.clear()
+        if len(miner_ids) > len(self.ids):
+            self._allocate(len(miner_ids))
+        for position, uid in enumerate(miner_ids.tolist()):
+            # A repeated miner_id keeps its first slot and its last values
+            slot = self.slot(uid)
+            self.values[:, slot] = values[:, position]
+        self._rescore_all()
+        self.loaded = True
+
+    def remove(self, uids):
+        """Drops the given uids, keeping the order of the remaining slots."""
+        drop = [self.slots[uid] for uid in uids if uid in self.slots]
+        if not drop:
+            return
+        keep = np.ones(self.size, dtype=bool)
+        keep[drop] = False
+        size = int(keep.sum())
+        self.ids[:size] = self.ids[:self.size][keep]
+        self.values[:, :size] = self.values[:, :self.size][:, keep]
+        self.base[:size] = self.base[:self.size][keep]
+        self.rates[:size] = self.rates[:self.size][keep]
+        self.size = size
+        self.slots = {uid: slot for slot, uid in enumerate(self.ids[:size].tolist())}
+        self._max_stale = True
+        self._ranking = None
+
+    def clear(self):
+        self.size = 0
+        self.slots = {}
+        self._max_error_rate = 0.0
+        self._max_stale = False
+        self._ranking = None
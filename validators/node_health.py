@@ -0,0 +1,84 @@
+import time
+
+
+class NodeHealth:
+    """Consecutive failures and next probe time of every (miner_id, ip) node that is failing.
+
+    A node that failed n times in a row is not probed again for base_delay * 2 ** (n - 1)
+    seconds, capped at max_delay, so a dead node costs one probe per backoff window instead of
+    a retry storm every cycle. Healthy nodes have no entry. Times are wall clock seconds since
+    they are persisted; changes stay in memory until changes() hands them out for writing.
+    """
+
+    def __init__(self, base_delay=600, max_delay=6 * 3600):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.loaded = False
+        self._nodes = {}
+        self._dirty = set()
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def load(self, rows):
+        """Replaces the state with (miner_id, ip, consecutive_failures, next_probe_at) rows as read from SQLite."""
+        self._nodes = {(miner_id, ip): (failures, next_probe_at) for miner_id, ip, failures, next_probe_at in rows}
+        self._dirty = set()
+        self.loaded = True
+
+    def backing_off(self, miner_id, ip, now=None):
+        """True when the node failed recently and must not be probed before its next probe time."""
+        entry = self._nodes.get((miner_id, ip))
+        if entry is None:
+            return False
+        return (time.time() if now is None else now) < entry[1]
+
+    def record_failure(self, miner_id, ip, now=None):
+        """Counts one more consecutive failure and returns the time of the next probe."""
+        key = (miner_id, ip)
+        failures = self._nodes.get(key, (0, 0))[0] + 1
+        delay = min(self.max_delay, self.base_delay * 2 ** min(failures - 1, 32))
+        next_probe_at = (time.time() if now is None else now) + delay
+        self._nodes[key] = (failures, next_probe_at)
+        self._dirty.add(key)
+        return next_probe_at
+
+    def record_success(self, miner_id, ip):
+        key = (miner_id, ip)
+        if self._nodes.pop(key, None) is not None:
+            self._dirty.add(key)
+
+    def forget(self, miner_ids):
+        """Drops the state of every node of the given miners, without marking it for writing."""
+        miner_ids = set(miner_ids)
+        for key in [key for key in self._nodes if key[0] in miner_ids]:
+            del self._nodes[key]
+            self._dirty.discard(key)
+
+    def rows(self, miner_ids):
+        """Returns the (miner_id, ip, consecutive_failures, next_probe_at) rows of the given miners."""
+        miner_ids = set(miner_ids)
+        return [(*key, *entry) for key, entry in self._nodes.items() if key[0] in miner_ids]
+
+    def apply(self, upserts, deletes):
+        """Applies (upserts, deletes) as returned by changes() elsewhere, marking them for writing."""
+        for miner_id, ip, failures, next_probe_at in upserts:
+            self._nodes[(miner_id, ip)] = (failures, next_probe_at)
+            self._dirty.add((miner_id, ip))
+        for key in deletes:
+            key = tuple(key)
+            self._nodes.pop(key, None)
+            self._dirty.add(key)
+
+    def changes(self):
+        """Returns (upserts, deletes) made since the last call: node_health rows and (miner_id, ip) keys."""
+        upserts = []
+        deletes = []
+        for key in self._dirty:
+            entry = self._nodes.get(key)
+            if entry is None:
+                deletes.append(key)
+            else:
+                upserts.append((*key, *entry))
+        self._dirty = set()
+        return upserts, deletes
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+
+from validators.metrics import track
+
+logger = logging.getLogger('colorful_logger')
+
+
+class NotificationOutbox:
+    """Queues failure messages for miners and delivers them from background sender tasks.
+
+    A message is queued at most once per miner per cycle, and all messages still waiting for a
+    miner when a sender picks it up go out as one notification. send(miner_id, message) does the
+    delivery, with at most concurrency deliveries running at a time.
+    """
+
+    def __init__(self, send, concurrency=8):
+        self.send = send
+        self.concurrency = max(1, concurrency)
+        self.duplicates = 0
+        self._pending = {}
+        self._seen = set()
+        self._queue = None
+        self._senders = []
+
+    def __len__(self):
+        return len(self._pending)
+
+    def new_cycle(self):
+        """Forgets the messages posted in the previous cycle so they can be sent again."""
+        self._seen.clear()
+
+    def post(self, miner_id, message):
+        """Queues message for miner_id without waiting for delivery. Returns False for a duplicate."""
+        key = (miner_id, message)
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(key)
+        messages = self._pending.get(miner_id)
+        if messages is not None:
+            # The miner is already queued, the message goes out with the others
+            messages.append(message)
+            return True
+        self._pending[miner_id] = [message]
+        self._start()
+        self._queue.put_nowait(miner_id)
+        return True
+
+    def _start(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if not self._senders:
+            self._senders = [asyncio.ensure_future(self._sender()) for _ in range(self.concurrency)]
+
+    async def _sender(self):
+        while True:
+            miner_id = await self._queue.get()
+            try:
+                messages = self._pending.pop(miner_id, None)
+                if messages:
+                    logger.debug("Notifying miner %s of %d failures", miner_id, len(messages))
+                    with track('notification'):
+                        await self.send(miner_id, '; '.join(messages))
+            except Exception as e:
+                logger.error(f"Error notifying miner {miner_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def drain(self):
+        """Waits until every queued notification was delivered."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Stops the sender tasks, dropping notifications that were not delivered yet."""
+        for sender in self._senders:
+            sender.cancel()
+        await asyncio.gather(*self._senders, return_exceptions=True)
+        self._senders = []
+        self._pending.clear()
+        self._queue = None
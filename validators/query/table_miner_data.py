@@ -1,73 +1,100 @@
+import logging
 from sqLite import cursor, connection
+from validators.metrics import track
 import uuid
 
+logger = logging.getLogger('colorful_logger')
+
+UPSERT_MINER_DATA = """
+    INSERT INTO miner_data (
+        id, miner_id, cpu_score, ram_score, disk_score,
+        openai_tokens, groq_tokens, claude_tokens, gemini_tokens,
+        total_requests, zero_value_entries
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (miner_id) DO UPDATE SET
+        cpu_score = excluded.cpu_score,
+        ram_score = excluded.ram_score,
+        disk_score = excluded.disk_score,
+        openai_tokens = excluded.openai_tokens,
+        groq_tokens = excluded.groq_tokens,
+        claude_tokens = excluded.claude_tokens,
+        gemini_tokens = excluded.gemini_tokens,
+        total_requests = excluded.total_requests,
+        zero_value_entries = excluded.zero_value_entries
+"""
+UPSERT_MINER_DATA_RETURNING = UPSERT_MINER_DATA + " RETURNING *;"
+
 def miner_data_get_one(miner_id):
     """Fetches a single entry from the miner_data table by miner_id."""
     try:
-        print("Fetching single data from miner_data...")
+        logger.debug("Fetching single data from miner_data...")
         cursor.execute("SELECT * FROM miner_data WHERE miner_id = ?", (miner_id,))
         rows = cursor.fetchall()
         return rows
     except Exception as e:
-        print("**-- Error in get_data_from_miner_data --**", e)
+        logger.error("**-- Error in get_data_from_miner_data --** %s", e)
         return None
 
 def miner_data_get_all():
     """Fetches all entries from the miner_data table."""
     try:
-        print("Fetching all miner data...")
+        logger.debug("Fetching all miner data...")
         cursor.execute("SELECT * FROM miner_data")
         rows = cursor.fetchall()
         return rows
     except Exception as e:
-        print("**-- Error in get_data_from_miner_data --**", e)
+        logger.error("**-- Error in get_data_from_miner_data --** %s", e)
         return None
 
 def insert_data_in_miner_data(miner_id, miner_value):
     """Inserts data into the miner_data table, replacing existing entries for the same miner_id."""
     try:
-        print("Inserting data in miner_data table...")
+        with track('db_write'):
+            logger.debug("Inserting data in miner_data table...")
         
-        # Unpack the miner_value tuple
-        miner_id, cpu_score, ram_score, disk_score, openai_tokens, groq_tokens, claude_tokens, gemini_tokens, total_requests, zero_value_entries = miner_value
+            # Unpack the miner_value tuple
+            miner_id, cpu_score, ram_score, disk_score, openai_tokens, groq_tokens, claude_tokens, gemini_tokens, total_requests, zero_value_entries = miner_value
         
-        # Generate a new UUID for the id field
-        unique_id = str(uuid.uuid4())
-        
-        # Check if the miner_id already exists
-        query_check = "SELECT id FROM miner_data WHERE miner_id = ?"
-        cursor.execute(query_check, (miner_id,))
-        existing_row = cursor.fetchone()
+            # Generate a new UUID for the id field, kept only when the miner_id is new
+            unique_id = str(uuid.uuid4())
 
-        if existing_row:
-            # Delete the old record if it exists
-            delete_query = "DELETE FROM miner_data WHERE miner_id = ?"
-            cursor.execute(delete_query, (miner_id,))
-            print(f"Existing record for miner_id {miner_id} deleted.")
+            cursor.execute(UPSERT_MINER_DATA_RETURNING, (unique_id, miner_id, cpu_score, ram_score, disk_score, openai_tokens, groq_tokens, claude_tokens, gemini_tokens, total_requests, zero_value_entries))
+            row = cursor.fetchone()
 
-        # Insert the new data
-        query_insert = """INSERT INTO miner_data (
-            id, miner_id, cpu_score, ram_score, disk_score, 
-            openai_tokens, groq_tokens, claude_tokens, gemini_tokens, 
-            total_requests, zero_value_entries
-        )
-        VALUES (
-            ?, ?, ?, ?, ?, 
-            ?, ?, ?, ?, 
-            ?, ?
-        );"""
-        cursor.execute(query_insert, (unique_id, miner_id, cpu_score, ram_score, disk_score, openai_tokens, groq_tokens, claude_tokens, gemini_tokens, total_requests, zero_value_entries))
-        
-        # Commit the transaction
-        connection.commit()
-        
-        # Retrieve and return the inserted row
-        cursor.execute("SELECT * FROM miner_data WHERE id = ?", (unique_id,))
-        row = cursor.fetchone()
+            # Commit the transaction
+            connection.commit()
 
-        print("Data inserted in miner_data table...", row)
-        return row
+            logger.debug("Data inserted in miner_data table... %s", row)
+            return row
         
     except Exception as e:
-        print("**-- Error in insert_data_in_miner_data --**", e)
-        return None
\ No newline at end of file
+        logger.error("**-- Error in insert_data_in_miner_data --** %s", e)
+        return None
+
+def bulk_upsert_miner_data(miner_values):
+    """Upserts many (miner_id, cpu_score, ..., zero_value_entries) tuples in a single transaction."""
+    try:
+        with track('db_write'):
+            rows = [(str(uuid.uuid4()), *miner_value) for miner_value in miner_values]
+            if not rows:
+                return 0
+            with connection:
+                cursor.executemany(UPSERT_MINER_DATA, rows)
+            logger.debug("Upserted %s rows in miner_data table...", len(rows))
+            return len(rows)
+    except Exception as e:
+        logger.error("**-- Error in bulk_upsert_miner_data --** %s", e)
+        return None
+
+def delete_miner_data(miner_ids):
+    """Deletes the miner_data rows of the given miner_ids in one transaction."""
+    try:
+        with track('db_write'):
+            logger.debug("Deleting miner_data rows of deregistered miners...")
+            with connection:
+                cursor.executemany("DELETE FROM miner_data WHERE miner_id = ?", [(miner_id,) for miner_id in miner_ids])
+            return True
+    except Exception as e:
+        logger.error("**-- Error in delete_miner_data --** %s", e)
+        return False
@@ -1,162 +1,201 @@
+import logging
 import json
 import uuid
 from sqLite import cursor, connection
+from validators.metrics import track
+
+logger = logging.getLogger('colorful_logger')
+
+NODE_DETAIL_INSERT = """
+    INSERT INTO node_detail (id, name, status, ip, port, usage_port, miner_id, hotkey, certificate)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+UPSERT_NODE_DETAIL = NODE_DETAIL_INSERT + """
+    ON CONFLICT (miner_id, ip) DO UPDATE SET
+        name = excluded.name,
+        status = excluded.status,
+        port = excluded.port,
+        usage_port = excluded.usage_port,
+        hotkey = excluded.hotkey,
+        certificate = excluded.certificate
+    RETURNING *;
+"""
+UPSERT_NODE_DETAIL_PLACEHOLDER = NODE_DETAIL_INSERT + """
+    ON CONFLICT (miner_id) WHERE ip IS NULL DO UPDATE SET miner_id = excluded.miner_id
+    RETURNING *;
+"""
 
 def upsert_data_in_node_detail(miner_id, node_value):
     """Inserts or updates data in the node_detail table based on miner_id and IP."""
     try:
-        print("Upserting data in node_detail table...")
-        print("Node value...", node_value)
-        # Extracting the node details
-        node_data = node_value[miner_id][0]
-        ip = node_data['ip']
-        name = node_data['name']
-        status = node_data['status']
-        hotkey = node_data['hotkey']
-        certificate = node_data['certificate']
-        usage_port = node_data['usage_port']
-        port = node_data['port']
-        
-        if ip is None:
-            cursor.execute("SELECT * FROM node_detail WHERE ip IS NULL AND miner_id = ?", (miner_id,))
-        else:
-            cursor.execute("SELECT * FROM node_detail WHERE ip = ? AND miner_id = ?", (ip, miner_id))
-        row = cursor.fetchone()
-        print("Node_detail Row...", row)
-        # If an entry already exists for the given IP and miner_id, return the existing row
-        if row:
-            print("Entry already exists for the given IP and miner_id. No update performed...")
-            return row  # Return the existing row
-        # Now check if there's an entry where ip is NULL and the miner_id is the same
-        cursor.execute("SELECT * FROM node_detail WHERE ip IS NULL AND miner_id = ?", (miner_id,))
-        null_ip_row = cursor.fetchone()
-        # If an entry with ip=NULL exists for the miner_id, delete it
-        if null_ip_row:
-            print(f"Deleting entry with ip=NULL for miner_id={miner_id}")
-            cursor.execute("DELETE FROM node_detail WHERE ip IS NULL AND miner_id = ?", (miner_id,))
+        with track('db_write'):
+            logger.debug("Upserting data in node_detail table...")
+            logger.debug("Node value... %s", node_value)
+            # Extracting the node details
+            node_data = node_value[miner_id][0]
+            ip = node_data['ip']
+            name = node_data['name']
+            status = node_data['status']
+            hotkey = node_data['hotkey']
+            certificate = node_data['certificate']
+            usage_port = node_data['usage_port']
+            port = node_data['port']
+
+            unique_id = str(uuid.uuid4())
+            values = (unique_id, name, status, ip, port, usage_port, miner_id, hotkey, certificate)
+            if ip is None:
+                # A placeholder row for a miner that did not answer, at most one per miner_id
+                cursor.execute(UPSERT_NODE_DETAIL_PLACEHOLDER, values)
+            else:
+                # Keeps the row id of an existing node and stores whatever changed about it
+                cursor.execute(UPSERT_NODE_DETAIL, values)
+            row = cursor.fetchone()
             connection.commit()
-        # Insert the new data
-        unique_id = str(uuid.uuid4())
-        query = """ 
-            INSERT INTO node_detail (id, name, status, ip, port, usage_port, miner_id, hotkey, certificate)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
-        """
-        cursor.execute(query, (unique_id, name, status, ip, port, usage_port, miner_id, hotkey, certificate))
-        connection.commit()
-        # Retrieve and return the inserted row
-        cursor.execute("SELECT * FROM node_detail WHERE id = ?", (unique_id,))
-        inserted_row = cursor.fetchone()
-        print("Data inserted in node_detail table...", inserted_row)
-        return inserted_row
+            logger.debug("Node_detail Row... %s", row)
+            return row
         
     except Exception as e:
-        print("XX-Error in upsert_data_in_node_detail-XX", e)
+        logger.error("XX-Error in upsert_data_in_node_detail-XX %s", e)
         return None
 
+def delete_node_detail_placeholder(miner_id):
+    """Deletes the placeholder row of a miner that has a reachable node again."""
+    try:
+        with track('db_write'):
+            logger.debug("Deleting node_detail placeholder of miner %s...", miner_id)
+            with connection:
+                cursor.execute("DELETE FROM node_detail WHERE ip IS NULL AND miner_id = ?", (miner_id,))
+            return True
+    except Exception as e:
+        logger.error("XX - Error in delete_node_detail_placeholder - XX %s", e)
+        return False
+
 def get_data_in_node_detail(miner_id, ip):
     """Fetches a single entry from the node_detail table by miner_id."""
     try:
-        print("Get data in node_detail table...")  
+        logger.debug("Get data in node_detail table...")
 
         cursor.execute("SELECT * FROM node_detail WHERE miner_id = ? AND ip = ?", (miner_id, ip))
         row = cursor.fetchone()        
         return row
     
     except Exception as e:
-        print("**-- Error in get_data_in_node_detail --**", e)
+        logger.error("**-- Error in get_data_in_node_detail --** %s", e)
         return None
 
 def delete_data_in_node_detail(miner_id):
     """Deletes a specific entry in the node_detail table based on miner_id."""
     try:
-        print("Deleting data in node_detail table...")        
-        print(f"::miner_id:: {type(miner_id)}")
+        with track('db_write'):
+            logger.debug("Deleting data in node_detail table...")
+            logger.debug("::miner_id:: %s", type(miner_id))
 
-        # Delete the row where id matches the provided miner_id
-        cursor.execute("DELETE FROM node_detail WHERE id = ?", (miner_id,))
+            # Delete the row where id matches the provided miner_id
+            cursor.execute("DELETE FROM node_detail WHERE id = ? RETURNING id", (miner_id,))
+            row = cursor.fetchone()
         
-        # Commit the transaction to ensure the delete is saved
-        connection.commit()
-
-        # Check if the row was successfully deleted by trying to fetch it
-        cursor.execute("SELECT * FROM node_detail WHERE id = ?", (miner_id,))
-        row = cursor.fetchone()
+            # Commit the transaction to ensure the delete is saved
+            connection.commit()
 
-        if row is None:
-            print(f"::Row with miner_id {miner_id} successfully deleted::")
-        else:
-            print(f"::Row with miner_id {miner_id} still exists::")
+            if row is not None:
+                logger.debug("::Row with miner_id %s successfully deleted::", miner_id)
+            else:
+                logger.debug("::No row found with miner_id %s::", miner_id)
         
     except Exception as e:
-        print("**-- Error in delete_data_in_node_detail --**", e)
+        logger.error("**-- Error in delete_data_in_node_detail --** %s", e)
         connection.rollback()  # Rollback in case of an error
 
 def update_data_in_node_detail(miner_id, node_value):
     """Updates a specific entry in the node_detail table based on miner_id."""
     try:
-        print("Updating data in node_detail table...")        
-        print(f"::miner_id:: {type(miner_id)}")
+        with track('db_write'):
+            logger.debug("Updating data in node_detail table...")
+            logger.debug("::miner_id:: %s", type(miner_id))
 
-        # Update the row where id matches the provided miner_id
-        cursor.execute("UPDATE node_detail SET node = ? WHERE id = ?", (json.dumps(node_value), miner_id))
+            # Update the row where id matches the provided miner_id
+            cursor.execute("UPDATE node_detail SET node = ? WHERE id = ?", (json.dumps(node_value), miner_id))
         
-        # Commit the transaction to ensure the update is saved
-        connection.commit()
-        print("Data updated in node_detail table...")
+            # Commit the transaction to ensure the update is saved
+            connection.commit()
+            logger.debug("Data updated in node_detail table...")
 
-        # Check if the row was successfully updated by trying to fetch it
-        cursor.execute("SELECT * FROM node_detail WHERE id = ?", (miner_id,))
-        row = cursor.fetchone()
+            # Check if the row was successfully updated by trying to fetch it
+            cursor.execute("SELECT * FROM node_detail WHERE id = ?", (miner_id,))
+            row = cursor.fetchone()
 
-        return row
+            return row
         
     except Exception as e:
-        print("**-- Error in update_data_in_node_detail --**", e)
+        logger.error("**-- Error in update_data_in_node_detail --** %s", e)
         connection.rollback()  # Rollback in case of an error
 
 def get_all_data_in_node_detail():
     """Fetches all entries from the node_detail table."""
     try:
-        print("Get all data in node_detail table...")
+        logger.debug("Get all data in node_detail table...")
 
         cursor.execute("SELECT * FROM node_detail")
         rows = cursor.fetchall()
         return rows
     
     except Exception as e:
-        print("XX - Error in get_all_data_in_node_detail - XX", e)
+        logger.error("XX - Error in get_all_data_in_node_detail - XX %s", e)
         return None
 
 def update_certificate_in_node_detail(miner_id, ip, certificate):
     """Updates a specific entry in the node_detail table based on miner_id."""
     try:
-        print("Updating certificate in node_detail table...")        
-        print(f"::miner_id:: {type(miner_id)}")
+        with track('db_write'):
+            logger.debug("Updating certificate in node_detail table...")
+            logger.debug("::miner_id:: %s", type(miner_id))
 
-        # Update the row where id matches the provided miner_id
-        cursor.execute("UPDATE node_detail SET certificate = ? WHERE ip = ? AND miner_id = ?", (certificate, ip, miner_id))
+            # Update the row where ip and miner_id match and return it
+            cursor.execute("UPDATE node_detail SET certificate = ? WHERE ip = ? AND miner_id = ? RETURNING *", (certificate, ip, miner_id))
+            row = cursor.fetchone()
         
-        # Commit the transaction to ensure the update is saved
-        connection.commit()
-        print("Certificate updated in node_detail table...")
-
-        # Check if the row was successfully updated by trying to fetch it
-        cursor.execute("SELECT * FROM node_detail WHERE id = ?", (miner_id,))
-        row = cursor.fetchone()
+            # Commit the transaction to ensure the update is saved
+            connection.commit()
+            logger.debug("Certificate updated in node_detail table...")
 
-        return row
+            return row
     
     except Exception as e:
-        print("**-- Error in update_certificate_in_node_detail --**", e)
+        logger.error("**-- Error in update_certificate_in_node_detail --** %s", e)
         connection.rollback()  # Rollback in case of an error
 
 def get_node_detail_by_ip(ip):
     """Fetches a single entry from the node_detail table by IP."""
     try:
-        print("Get node detail by IP...")
+        logger.debug("Get node detail by IP...")
         cursor.execute("SELECT * FROM node_detail WHERE ip = ?", (ip,))
         row = cursor.fetchone()
         return row
     except Exception as e:
-        print("XX - Error in get_node_detail_by_ip - XX", e)
-        return None
\ No newline at end of file
+        logger.error("XX - Error in get_node_detail_by_ip - XX %s", e)
+        return None
+
+def delete_node_detail_by_miner_ids(miner_ids):
+    """Deletes every node_detail row of the given miner_ids in one transaction."""
+    try:
+        with track('db_write'):
+            logger.debug("Deleting node_detail rows of deregistered miners...")
+            with connection:
+                cursor.executemany("DELETE FROM node_detail WHERE miner_id = ?", [(miner_id,) for miner_id in miner_ids])
+            return True
+    except Exception as e:
+        logger.error("XX - Error in delete_node_detail_by_miner_ids - XX %s", e)
+        return False
+
+def get_node_detail_map(miner_id=None):
+    """Fetches node_detail rows in one query, keyed by (miner_id, ip). Limited to one miner when miner_id is given."""
+    try:
+        logger.debug("Get node detail map...")
+        if miner_id is None:
+            cursor.execute("SELECT * FROM node_detail")
+        else:
+            cursor.execute("SELECT * FROM node_detail WHERE miner_id = ?", (miner_id,))
+        return {(row[6], row[3]): row for row in cursor.fetchall()}
+    except Exception as e:
+        logger.error("XX - Error in get_node_detail_map - XX %s", e)
+        return {}
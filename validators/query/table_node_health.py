@@ -0,0 +1,50 @@
+import logging
+from sqLite import cursor, connection
+from validators.metrics import track
+
+logger = logging.getLogger('colorful_logger')
+
+UPSERT_NODE_HEALTH = """
+    INSERT INTO node_health (miner_id, ip, consecutive_failures, next_probe_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (miner_id, ip) DO UPDATE SET
+        consecutive_failures = excluded.consecutive_failures,
+        next_probe_at = excluded.next_probe_at;
+"""
+
+def get_all_node_health():
+    """Fetches every (miner_id, ip, consecutive_failures, next_probe_at) row of the node_health table."""
+    try:
+        logger.debug("Fetching all node health...")
+        cursor.execute("SELECT miner_id, ip, consecutive_failures, next_probe_at FROM node_health")
+        return cursor.fetchall()
+    except Exception as e:
+        logger.error("XX - Error in get_all_node_health - XX %s", e)
+        return None
+
+def save_node_health(upserts, deletes):
+    """Upserts (miner_id, ip, consecutive_failures, next_probe_at) rows and deletes (miner_id, ip) keys in one transaction."""
+    try:
+        with track('db_write'):
+            if not upserts and not deletes:
+                return True
+            with connection:
+                cursor.executemany(UPSERT_NODE_HEALTH, upserts)
+                cursor.executemany("DELETE FROM node_health WHERE miner_id = ? AND ip = ?", deletes)
+            logger.debug("Saved node health, %s upserted and %s deleted...", len(upserts), len(deletes))
+            return True
+    except Exception as e:
+        logger.error("XX - Error in save_node_health - XX %s", e)
+        return False
+
+def delete_node_health_by_miner_ids(miner_ids):
+    """Deletes every node_health row of the given miner_ids in one transaction."""
+    try:
+        with track('db_write'):
+            logger.debug("Deleting node_health rows of deregistered miners...")
+            with connection:
+                cursor.executemany("DELETE FROM node_health WHERE miner_id = ?", [(miner_id,) for miner_id in miner_ids])
+            return True
+    except Exception as e:
+        logger.error("XX - Error in delete_node_health_by_miner_ids - XX %s", e)
+        return False
@@ -1,40 +1,41 @@
+import logging
 from sqLite import cursor, connection
+from validators.metrics import track
 import uuid
 
+logger = logging.getLogger('colorful_logger')
+
+UPSERT_NORMALIZED_SCORE = """
+    INSERT INTO normalized_scores (id, miner_id, score, rank)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (miner_id) DO UPDATE SET
+        score = excluded.score,
+        rank = excluded.rank;
+"""
+INSERT_NORMALIZED_SCORE = """
+    INSERT INTO normalized_scores (id, miner_id, score, rank)
+    VALUES (?, ?, ?, ?);
+"""
+
 def insert_data_in_normalized_score(score_details):
     """Inserts or updates a score in the normalized_scores table."""
     try:
-        # Generate a new UUID for the id field
-        unique_id = str(uuid.uuid4())
-        
-        # Unpack the score_details tuple
-        miner_id, score, rank = score_details
+        with track('db_write'):
+            # Generate a new UUID for the id field, kept only when the miner_id is new
+            unique_id = str(uuid.uuid4())
         
-        # Check if the miner_id already exists
-        query_check = "SELECT id FROM normalized_scores WHERE miner_id = ?"
-        cursor.execute(query_check, (miner_id,))
-        existing_row = cursor.fetchone()
-
-        if existing_row:
-            # Delete the old record if it exists
-            delete_query = "DELETE FROM normalized_scores WHERE miner_id = ?"
-            cursor.execute(delete_query, (miner_id,))
-            print(f"Existing record for miner_id {miner_id} deleted.")
-
-        # Insert the new data
-        query_insert = """
-            INSERT INTO normalized_scores (id, miner_id, score, rank)
-            VALUES (?, ?, ?, ?);
-        """
-        cursor.execute(query_insert, (unique_id, miner_id, score, rank))
+            # Unpack the score_details tuple
+            miner_id, score, rank = score_details
+
+            cursor.execute(UPSERT_NORMALIZED_SCORE, (unique_id, miner_id, score, rank))
         
-        # Commit the transaction
-        connection.commit()
+            # Commit the transaction
+            connection.commit()
         
-        print("Data inserted in normalized_scores table...")
+            logger.debug("Data inserted in normalized_scores table...")
         
     except Exception as e:
-        print("XX-Error in insert_data_in_normalized_score-XX", e)
+        logger.error("XX-Error in insert_data_in_normalized_score-XX %s", e)
 
 def get_a_data_from_normalized_score(miner_id):
     """Fetches a single entry from the normalized_scores table by miner_id."""
@@ -43,7 +44,7 @@ def get_a_data_from_normalized_score(miner_id):
         row = cursor.fetchone()
         return row
     except Exception as e:
-        print("XX-Error in get_a_data_from_normalized_score-XX", e)
+        logger.error("XX-Error in get_a_data_from_normalized_score-XX %s", e)
         return None
 
 def get_all_data_from_normalized_score():
@@ -53,5 +54,30 @@ def get_all_data_from_normalized_score():
         rows = cursor.fetchall()
         return rows
     except Exception as e:
-        print("XX-Error in get_all_data_from_normalized_score-XX", e)
+        logger.error("XX-Error in get_all_data_from_normalized_score-XX %s", e)
         return None
+
+def replace_normalized_scores(score_details):
+    """Atomically replaces the whole ranking with the given (miner_id, score, rank) tuples."""
+    try:
+        with track('db_write'):
+            rows = [(str(uuid.uuid4()), miner_id, score, rank) for miner_id, score, rank in score_details]
+            with connection:
+                cursor.execute("DELETE FROM normalized_scores")
+                cursor.executemany(INSERT_NORMALIZED_SCORE, rows)
+            logger.debug("Replaced normalized_scores table with %s rows...", len(rows))
+            return True
+    except Exception as e:
+        logger.error("XX-Error in replace_normalized_scores-XX %s", e)
+        return False
+
+def delete_normalized_scores(miner_ids):
+    """Deletes the normalized_scores rows of the given miner_ids in one transaction."""
+    try:
+        with track('db_write'):
+            with connection:
+                cursor.executemany("DELETE FROM normalized_scores WHERE miner_id = ?", [(miner_id,) for miner_id in miner_ids])
+            return True
+    except Exception as e:
+        logger.error("XX-Error in delete_normalized_scores-XX %s", e)
+        return False
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import math
+import random
+from collections import deque
+
+import aiohttp
+
+from validators.metrics import count_hedge, count_retry, track
+
+logger = logging.getLogger('colorful_logger')
+
+
+class AttemptFailed(Exception):
+    """Raised by an attempt whose response is unusable (bad status, empty body) and worth retrying."""
+
+
+class RequestFailed(Exception):
+    """Raised by RequestPolicy.run() when no attempt succeeded within the attempts and the deadline."""
+
+
+class RequestPolicy:
+    """Retries, backoff and hedging of one kind of outbound request, all within a total deadline.
+
+    Each attempt is bounded by attempt_timeout and by what is left of deadline, and the jittered
+    exponential backoff between attempts is skipped when it would not leave time for another try,
+    so a call never takes longer than deadline. With hedge_quantile set, an idempotent request
+    still unanswered after that quantile of the recent successful latencies gets a second request
+    racing it, and the first success wins.
+    """
+
+    def __init__(self, deadline=30, attempt_timeout=10, max_attempts=3, backoff_base=1, backoff_max=8,
+                 hedge_quantile=None, hedge_min_samples=20, hedge_min_delay=0.05, window=256,
+                 retry_on=(aiohttp.ClientError, asyncio.TimeoutError, AttemptFailed)):
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.retry_on = retry_on
+        self._latencies = deque(maxlen=window)
+        self._hedge_delay = None
+        self._samples_since_update = 0
+
+    def backoff(self, attempt):
+        """Delay before the attempt following the given zero-based one, jittered between half and all of it."""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def hedge_delay(self):
+        """Seconds after which a second request is sent, or None while hedging is off or unwarmed."""
+        if not self.hedge_quantile or len(self._latencies) < self.hedge_min_samples:
+            return None
+        if self._hedge_delay is None or self._samples_since_update >= 16:
+            latencies = sorted(self._latencies)
+            index = min(len(latencies) - 1, math.ceil(self.hedge_quantile * len(latencies)) - 1)
+            self._hedge_delay = max(self.hedge_min_delay, latencies[index])
+            self._samples_since_update = 0
+        return self._hedge_delay
+
+    def _observe(self, latency):
+        self._latencies.append(latency)
+        self._samples_since_update += 1
+
+    async def _timed(self, attempt, timeout):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await asyncio.wait_for(attempt(), timeout)
+        self._observe(loop.time() - start)
+        return result
+
+    async def _hedged(self, attempt, timeout, hedge_delay, stage):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        pending = {asyncio.ensure_future(attempt())}
+        error = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                count_hedge(stage)
+                logger.debug("No answer after %.3fs, sending a hedged %s request", hedge_delay, stage)
+                pending.add(asyncio.ensure_future(attempt()))
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        self._observe(loop.time() - start)
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(
+                    pending, timeout=start + timeout - loop.time(), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+        finally:
+            # Also reached when the caller is cancelled, no attempt may outlive this call
+            for task in pending:
+                task.cancel()
+
+    async def run(self, attempt, stage, deadline=None):
+        """Calls the attempt coroutine function until it returns, retrying the retry_on exceptions.
+
+        deadline overrides the policy's total budget in seconds for this call. Raises RequestFailed
+        from the last error once the attempts or the budget are used up.
+        """
+        loop = asyncio.get_running_loop()
+        end = loop.time() + (self.deadline if deadline is None else deadline)
+        error = None
+        for number in range(self.max_attempts):
+            timeout = min(self.attempt_timeout, end - loop.time())
+            if timeout <= 0:
+                break
+            hedge_delay = self.hedge_delay()
+            try:
+                with track(stage):
+                    if hedge_delay is not None and hedge_delay < timeout:
+                        return await self._hedged(attempt, timeout, hedge_delay, stage)
+                    return await self._timed(attempt, timeout)
+            except self.retry_on as e:
+                error = e
+                logger.warning(f"{stage} attempt {number + 1}/{self.max_attempts} failed: {e!r}")
+
+            if number + 1 < self.max_attempts:
+                delay = self.backoff(number)
+                if loop.time() + delay >= end:
+                    break
+                count_retry(stage)
+                await asyncio.sleep(delay)
+        raise RequestFailed(f"{stage} failed after {number + 1} attempts: {error!r}") from error
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+
+logger = logging.getLogger('colorful_logger')
+
+
+class CycleScheduler:
+    """Runs the validation cycle on a fixed period and never lets two cycles overlap.
+
+    Scheduled runs and on-demand runs (HTTP routes) share the same single-flight slot: a
+    caller arriving while a cycle is in flight waits for that cycle instead of starting one.
+    """
+
+    def __init__(self, cycle, period=900, jitter=0.1, deadline=None, overrun_policy='shorten', history_size=100):
+        if overrun_policy not in ('shorten', 'skip'):
+            raise ValueError(f"Unknown overrun policy: {overrun_policy}")
+        self.cycle = cycle
+        self.period = period
+        self.jitter = jitter
+        self.deadline = deadline
+        self.overrun_policy = overrun_policy
+        self.history = deque(maxlen=history_size)
+        self._inflight = None
+
+    @property
+    def running(self):
+        return self._inflight is not None and not self._inflight.done()
+
+    async def run_cycle(self, trigger='manual'):
+        """Runs one cycle, or joins the cycle already in flight. Returns the cycle's result."""
+        if self.running:
+            logger.info(f"Cycle already running, {trigger} request joins it")
+        else:
+            self._inflight = asyncio.ensure_future(self._run(trigger))
+        # Shielded so a cancelled caller (e.g. a dropped HTTP request) does not cancel the cycle
+        return await asyncio.shield(self._inflight)
+
+    async def _run(self, trigger):
+        record = {'trigger': trigger, 'started_at': time.time(), 'status': None}
+        start = time.monotonic()
+        result = None
+        logger.info(f"Cycle started ({trigger})")
+        try:
+            if self.deadline:
+                result = await asyncio.wait_for(self.cycle(), timeout=self.deadline)
+            else:
+                result = await self.cycle()
+            record['status'] = 'failed' if result is False else 'ok'
+        except asyncio.TimeoutError:
+            record['status'] = 'deadline_exceeded'
+            logger.error(f"Cycle exceeded its {self.deadline}s deadline and was cancelled")
+        except Exception as e:
+            record['status'] = 'failed'
+            logger.error(f"Error in validation cycle: {e}")
+        finally:
+            record['status'] = record['status'] or 'cancelled'
+            record['ended_at'] = time.time()
+            record['duration'] = time.monotonic() - start
+            self.history.append(record)
+            logger.info(f"Cycle ended ({trigger}) with status {record['status']} in {record['duration']:.1f}s")
+        return result
+
+    def _next_delay(self, next_start):
+        """Returns (next_start, delay) for the slot after a cycle that should have started at next_start."""
+        now = time.monotonic()
+        next_start += self.period
+        if now > next_start:
+            if self.overrun_policy == 'skip':
+                missed = int((now - next_start) // self.period) + 1
+                next_start += missed * self.period
+                logger.warning(f"Previous cycle overran the {self.period}s period, skipping {missed} slot(s)")
+            else:
+                next_start = now
+                logger.warning(f"Previous cycle overran the {self.period}s period, starting the next one now")
+        delay = max(0.0, next_start - now) + random.uniform(0, self.jitter * self.period)
+        return next_start, delay
+
+    async def run_forever(self):
+        """Runs cycles on the configured period until cancelled."""
+        next_start = time.monotonic()
+        while True:
+            await self.run_cycle('schedule')
+            next_start, delay = self._next_delay(next_start)
+            logger.info(f"Next cycle in {delay:.1f}s")
+            await asyncio.sleep(delay)
@@ -0,0 +1,112 @@
+import numpy as np
+
+# Column order of a miner_data row after the id, matching the table definition
+MINER_COLUMNS = (
+    'miner_id', 'cpu_score', 'ram_score', 'disk_score',
+    'openai_tokens', 'groq_tokens', 'claude_tokens', 'gemini_tokens',
+    'total_requests', 'zero_value_entries',
+)
+
+
+def miner_rows_to_columns(miner_data):
+    """Converts miner_data rows into (miner_ids, values) arrays, with None read as 0.
+
+    values holds one contiguous row per MINER_COLUMNS entry after miner_id and one column per miner.
+    """
+    if not miner_data:
+        return np.empty(0, dtype=np.int64), np.empty((len(MINER_COLUMNS) - 1, 0))
+    miner_ids = np.array([row[1] for row in miner_data], dtype=np.int64)
+    values = np.array([row[2:] for row in miner_data], dtype=np.float64).T.copy()
+    np.nan_to_num(values, copy=False, nan=0.0)
+    return miner_ids, values
+
+
+def base_scores(values):
+    """Weighted resource and token score per miner, also works on one miner's values as plain floats."""
+    cpu, ram, disk, openai, groq, claude, gemini = values[:7]
+    # Same left to right evaluation order as the scalar formula so results are bit identical
+    return (
+        cpu * 0.1 +
+        ram * 0.05 +
+        disk * 0.05 +
+        groq * 0.25 +
+        openai * 0.15 +
+        claude * 0.15 +
+        gemini * 0.25
+    )
+
+
+def error_rates(values):
+    """zero_value_entries / total_requests per miner, 0 when there were no requests."""
+    total_requests = values[7]
+    zero_value_entries = values[8]
+    rates = np.zeros(values.shape[1])
+    np.divide(zero_value_entries, total_requests, out=rates, where=total_requests > 0)
+    return rates
+
+
+def adjust_scores(base, rates, max_error_rate=None):
+    """Applies the error rate adjustment to the base scores. max_error_rate defaults to rates.max()."""
+    if len(base) == 0:
+        return np.empty(0)
+    if max_error_rate is None:
+        max_error_rate = rates.max()
+
+    adjustment = np.ones(len(base))
+    high = rates > 0.1
+    adjustment[high] = 1 - (rates[high] - 0.1) * 2
+    if max_error_rate > 0.1:
+        low = rates < 0.02
+        adjustment[low] = 1 + (0.02 - rates[low]) / 0.02 * 0.1
+
+    adjusted = base * adjustment
+    if max_error_rate > 0:
+        adjusted = adjusted * (1 + (0.5 - rates / max_error_rate))
+    return adjusted
+
+
+def rank_scores(miner_ids, adjusted):
+    """Normalizes the adjusted scores to sum to 1 and ranks them, best first.
+
+    Returns (miner_ids, scores, ranks) arrays in rank order, empty when the scores do not sum above 0.
+    """
+    empty = (np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int64))
+    if len(adjusted) == 0:
+        return empty
+    # cumsum accumulates sequentially, matching Python's sum() rather than pairwise summation
+    total_score = np.cumsum(adjusted)[-1]
+    if not total_score > 0:
+        return empty
+    normalized = adjusted / total_score
+    order = np.argsort(-normalized, kind='stable')
+    return miner_ids[order], normalized[order], np.arange(1, len(order) + 1)
+
+
+def has_duplicates(miner_ids):
+    """True when a miner_id appears more than once, cheap for the sorted ids SQLite returns."""
+    if len(miner_ids) < 2 or np.all(miner_ids[1:] > miner_ids[:-1]):
+        return False
+    return len(np.unique(miner_ids)) != len(miner_ids)
+
+
+def score_columns(miner_ids, values):
+    """Scores and ranks miners given as column arrays. Returns (miner_ids, scores, ranks) arrays."""
+    if has_duplicates(miner_ids):
+        # A repeated miner_id keeps its first position and its last values, as a dict would
+        last_row = {}
+        for position, miner_id in enumerate(miner_ids.tolist()):
+            last_row[miner_id] = position
+        rows = np.fromiter(last_row.values(), dtype=np.int64, count=len(last_row))
+        miner_ids, values = miner_ids[rows], values[:, rows]
+    adjusted = adjust_scores(base_scores(values), error_rates(values))
+    return rank_scores(miner_ids, adjusted)
+
+
+def ranked_list(ranking):
+    """Converts (miner_ids, scores, ranks) arrays into [(miner_id, score, rank)] tuples."""
+    return list(zip(*(column.tolist() for column in ranking)))
+
+
+def normalize_scores(miner_data):
+    """Scores and ranks miner_data rows. Returns [(miner_id, score, rank)]."""
+    return ranked_list(score_columns(*miner_rows_to_columns(miner_data)))
@@ -0,0 +1,337 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+
+import bittensor as bt
+import numpy as np
+
+from ssl_pinning_client import close_pinned_session
+from validators.base_validator import Validator
+from validators.cert_store import VerifierCertStore
+from validators.log_setup import setup_logging
+from validators.metrics import REGISTRY
+from validators.miner_table import VALUE_COLUMNS
+from validators.notification_outbox import NotificationOutbox
+from validators.query.table_node_detail import get_all_data_in_node_detail
+from validators.usage_history import USAGE_FIELDS, USAGE_PROVIDERS, compact_usage
+
+logger = logging.getLogger('colorful_logger')
+
+# Node results a worker buffers before sending them to the coordinator
+RESULT_BATCH_SIZE = 64
+
+
+class MetagraphSnapshot:
+    """The parts of a metagraph the shard workers read, small enough to send to them each resync."""
+
+    def __init__(self, uids, hotkeys, axons, block=None):
+        self.uids = np.asarray(uids, dtype=np.int64)
+        self.hotkeys = list(hotkeys)
+        self.axons = list(axons)
+        self.block = block
+
+    @classmethod
+    def of(cls, metagraph):
+        block = getattr(metagraph, 'block', None)
+        return cls(metagraph.uids.tolist(), metagraph.hotkeys, metagraph.axons, int(block) if block is not None else None)
+
+    def sync(self, subtensor=None):
+        # Workers never resync, the coordinator sends a new snapshot instead
+        pass
+
+
+def default_components(config):
+    """Builds a worker's own wallet and dendrite from the validator config."""
+    wallet = bt.wallet(config=config)
+    return bt.dendrite(wallet=wallet), wallet
+
+
+class ShardValidator(Validator):
+    """Runs discovery, attestation and usage fetch for one shard of uids inside a worker process.
+
+    Node results, node health changes and failure notifications are sent to the coordinator as
+    messages tagged with the shard and cycle instead of being accumulated and persisted here.
+    node_detail rows are still written by the worker, every miner's rows belong to one shard, so
+    its usage fetch reads them back within the cycle. Those single-row upserts share the SQLite
+    file with the coordinator's bulk writes: WAL lets one writer in at a time and the others wait
+    on busy_timeout (sqLite.connect), a write still locked out after it is logged and dropped.
+    Workers read the verifier's db.json without ever rewriting it and report the ips whose
+    certificates they consumed, the coordinator tombstones those and compacts the file.
+    """
+
+    def __init__(self, shard, results, dendrite, config, wallet, metagraph):
+        super().__init__(dendrite=dendrite, config=config, subtensor=None, wallet=wallet, metagraph=metagraph)
+        self.shard = shard
+        self.results = results
+        self.cycle = None
+        self.nodes = 0
+        self.cert_store = VerifierCertStore(self.db_path, compact_threshold=None)
+        self._consumed_ips = []
+        # Deduplicated and coalesced here, then delivered by the coordinator's own outbox
+        self.notifications = NotificationOutbox(self.forward_notification, concurrency=1)
+        self._reset_batch()
+
+    def _reset_batch(self):
+        self._miner_ids = []
+        self._ips = []
+        self._hotkeys = []
+        # Fresh arrays per batch, the queue pickles a sent batch later in its feeder thread
+        self._batch_increments = np.zeros((RESULT_BATCH_SIZE, len(VALUE_COLUMNS)))
+        self._batch_usage = np.zeros((RESULT_BATCH_SIZE, len(USAGE_PROVIDERS), len(USAGE_FIELDS)), dtype=np.int64)
+
+    def send(self, kind, *payload):
+        self.results.put((kind, self.shard, self.cycle, *payload))
+
+    def on_metagraph_change(self, diff):
+        # Stored data of stale uids is dropped by the coordinator
+        pass
+
+    def load_miner_data(self):
+        pass
+
+    def apply_node_result(self, item, node_info):
+        if node_info is None:
+            return
+        uuid, name, status, ip, port, usage_port, miner_id, hotkey, certificate = item
+        row = len(self._miner_ids)
+        self.node_increments(node_info, self._batch_increments[row])
+        self._batch_usage[row] = compact_usage(node_info['usage_summary'])
+        self._miner_ids.append(miner_id)
+        self._ips.append(ip)
+        self._hotkeys.append(hotkey)
+        self.nodes += 1
+        if len(self._miner_ids) == RESULT_BATCH_SIZE:
+            self.flush_miner_data()
+
+    def flush_miner_data(self):
+        """Sends the buffered node results as one ('nodes', ...) message."""
+        count = len(self._miner_ids)
+        if count:
+            self.send('nodes', self._miner_ids, self._ips, self._hotkeys, self._batch_increments[:count], self._batch_usage[:count])
+            self._reset_batch()
+
+    def flush_node_health(self):
+        upserts, deletes = self.node_health.changes()
+        if upserts or deletes:
+            self.send('health', upserts, deletes)
+
+    async def forward_notification(self, miner_id, message):
+        self.send('notify', miner_id, message)
+
+    def get_verifier_data(self, search_ip):
+        verifier_data = super().get_verifier_data(search_ip)
+        if verifier_data:
+            self._consumed_ips.append(search_ip)
+        return verifier_data
+
+    def flush_consumed_certs(self):
+        """Sends the ips whose verifier entries were consumed as one ('certs', ...) message."""
+        if self._consumed_ips:
+            self.send('certs', self._consumed_ips)
+            self._consumed_ips = []
+
+    async def run_shard_cycle(self, cycle, uids, health_rows):
+        """Runs the per-node stages of one cycle for uids. Returns the number of nodes with usage."""
+        self.cycle = cycle
+        self.nodes = 0
+        self.notifications.new_cycle()
+        self.node_health.load(health_rows)
+        try:
+            await self.collect_node_details(uids)
+        finally:
+            self.flush_consumed_certs()
+        shard_uids = set(uids)
+        node_info = [row for row in get_all_data_in_node_detail() or [] if row[6] in shard_uids]
+        await self.get_node_score(node_info)
+        await self.notifications.drain()
+        return self.nodes
+
+
+async def _serve_shard(shard, config, components, tasks, results):
+    dendrite, wallet = components(config)
+    loop = asyncio.get_running_loop()
+    validator = None
+    try:
+        while True:
+            task = await loop.run_in_executor(None, tasks.get)
+            if task is None:
+                break
+            cycle, uids, snapshot, health_rows = task
+            if snapshot is not None:
+                if validator is None:
+                    validator = ShardValidator(shard, results, dendrite, config, wallet, snapshot)
+                else:
+                    validator.metagraph_cache.replace(snapshot)
+            try:
+                nodes = await validator.run_shard_cycle(cycle, uids, health_rows)
+            except Exception as e:
+                logger.error(f"Error in shard {shard} cycle {cycle}: {e}")
+                results.put(('error', shard, cycle, str(e)))
+                nodes = validator.nodes
+            # Stage latency, retries and hedges of this cycle, served by the coordinator's /metrics
+            results.put(('metrics', shard, cycle, REGISTRY.drain()))
+            results.put(('done', shard, cycle, len(uids), nodes))
+    finally:
+        if validator is not None:
+            await validator.notifications.close()
+            await validator.attestation_client.close()
+        await close_pinned_session()
+
+
+def run_shard(shard, config, components, tasks, results):
+    """Process target of a shard worker: runs the cycles put on tasks until it receives None."""
+    setup_logging(getattr(config, 'log_level', None))
+    asyncio.run(_serve_shard(shard, config, components, tasks, results))
+
+
+class ShardCoordinator:
+    """Runs the per-node stages of a cycle in shard worker processes and merges their results.
+
+    uids are split by uid % shards, so a miner always lands in the same worker and that worker's
+    verdict cache, pinned contexts and sessions stay warm across cycles. Workers stream compact
+    node results, node health changes and failure notifications back while they run; the
+    coordinator adds them to the validator's miner table and outboxes and persists them, and the
+    validator then scores and sets weights once as in single-process mode.
+    """
+
+    def __init__(self, validator, shards, components=default_components):
+        self.validator = validator
+        self.shards = shards
+        self.components = components
+        self.cycle = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._results = self._context.Queue()
+        self._workers = [None] * shards
+        self._sent_version = [None] * shards
+        self._inbox = None
+        self._reader = None
+        self._consumed_ips = []
+
+    def _start_reader(self):
+        """Moves worker messages to an asyncio queue from a thread, so none is lost to a cancelled cycle."""
+        if self._reader is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._inbox = asyncio.Queue()
+
+        def read():
+            while True:
+                message = self._results.get()
+                if message is None:
+                    break
+                loop.call_soon_threadsafe(self._inbox.put_nowait, message)
+
+        self._reader = threading.Thread(target=read, name='shard-results', daemon=True)
+        self._reader.start()
+
+    def _ensure_worker(self, shard):
+        worker = self._workers[shard]
+        if worker is not None and worker[0].is_alive():
+            return worker
+        if worker is not None:
+            logger.warning(f"Shard worker {shard} exited with code {worker[0].exitcode}, restarting it")
+        tasks = self._context.Queue()
+        process = self._context.Process(
+            target=run_shard,
+            args=(shard, self.validator.config, self.components, tasks, self._results),
+            name=f"shard-{shard}",
+            daemon=True,
+        )
+        process.start()
+        self._workers[shard] = (process, tasks)
+        self._sent_version[shard] = None
+        return self._workers[shard]
+
+    def start(self):
+        """Starts every worker ahead of the first cycle, which would otherwise pay for their imports."""
+        for shard in range(self.shards):
+            self._ensure_worker(shard)
+
+    async def run_cycle(self, uids):
+        """Runs discovery, attestation and usage fetch of uids across the shards and persists the results."""
+        validator = self.validator
+        self.cycle += 1
+        self._start_reader()
+        if not validator.miner_table.loaded:
+            validator.load_miner_data()
+        version = validator.metagraph_cache.version
+        snapshot = None
+        waiting = set()
+        for shard in range(self.shards):
+            shard_uids = [uid for uid in uids if uid % self.shards == shard]
+            process, tasks = self._ensure_worker(shard)
+            metagraph = None
+            if self._sent_version[shard] != version:
+                snapshot = snapshot or MetagraphSnapshot.of(validator.metagraph)
+                metagraph = snapshot
+                self._sent_version[shard] = version
+            tasks.put((self.cycle, shard_uids, metagraph, validator.node_health.rows(shard_uids)))
+            waiting.add(shard)
+        logger.info(f"Cycle {self.cycle} dispatched to {self.shards} shard workers")
+        try:
+            await self._collect(waiting)
+        finally:
+            validator.flush_miner_data()
+            validator.flush_node_health()
+            # Only this store may compact db.json, once the workers are done reading it this cycle
+            consumed, self._consumed_ips = self._consumed_ips, []
+            validator.cert_store.discard(consumed)
+
+    async def _collect(self, waiting):
+        while waiting:
+            try:
+                message = await asyncio.wait_for(self._inbox.get(), timeout=1.0)
+            except asyncio.TimeoutError:
+                for shard in list(waiting):
+                    process = self._workers[shard][0]
+                    if not process.is_alive():
+                        logger.error(f"Shard worker {shard} exited with code {process.exitcode}, its results of cycle {self.cycle} are lost")
+                        waiting.discard(shard)
+                continue
+            kind, shard, cycle, *payload = message
+            if kind == 'certs':
+                # Consumed whatever cycle they were sent in, they must not outlive a compaction
+                self._consumed_ips.extend(payload[0])
+                continue
+            if kind == 'metrics':
+                REGISTRY.merge(payload[0])
+                continue
+            if cycle != self.cycle:
+                # Left over from a cycle that was cancelled before its workers finished
+                continue
+            self._apply(kind, shard, payload)
+            if kind == 'done':
+                waiting.discard(shard)
+
+    def _apply(self, kind, shard, payload):
+        validator = self.validator
+        if kind == 'nodes':
+            miner_ids, ips, hotkeys, increments, usage = payload
+            for row, miner_id in enumerate(miner_ids):
+                validator.apply_node_usage(miner_id, ips[row], hotkeys[row], increments[row], usage[row])
+        elif kind == 'health':
+            validator.node_health.apply(*payload)
+        elif kind == 'notify':
+            validator.notifications.post(*payload)
+        elif kind == 'error':
+            logger.error(f"Shard worker {shard} failed cycle {self.cycle}: {payload[0]}")
+        elif kind == 'done':
+            uids, nodes = payload
+            logger.info(f"Shard {shard} finished: {uids} uids, {nodes} nodes with usage")
+
+    def close(self, timeout=10):
+        """Asks every worker to stop and terminates the ones still running after timeout seconds."""
+        for worker in self._workers:
+            if worker is not None and worker[0].is_alive():
+                worker[1].put(None)
+        for worker in self._workers:
+            if worker is not None:
+                worker[0].join(timeout)
+                if worker[0].is_alive():
+                    worker[0].terminate()
+        self._workers = [None] * self.shards
+        if self._reader is not None:
+            self._results.put(None)
+            self._reader.join(timeout)
+            self._reader = None
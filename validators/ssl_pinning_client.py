@@ -1,5 +1,6 @@
 import ssl
 import json
+import hashlib
 import logging
 import asyncio
 import aiohttp
@@ -11,22 +12,25 @@ from fastapi import FastAPI, HTTPException
 # Import files & folders
 from validators.query.table_node_detail import *
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-# Configuration
-HOST: str
-PORT: int
+# Logs go through the validator's colorful_logger, configured in validators/log_setup.py
+logger = logging.getLogger('colorful_logger')
 
 app = FastAPI()
 
+# Pinned certificate per host and SSL context per (host, port, cert fingerprint)
+_pinned_certs = {}
+_ssl_contexts = {}
+_pinned_session = None
+
 async def load_cert_from_db(host):
     """Loads the certificate from the database based on the host."""
+    if host in _pinned_certs:
+        return _pinned_certs[host]
     try:
 
         node_detail = get_node_detail_by_ip(host)
         if node_detail is not None:
+            _pinned_certs[host] = node_detail[8]
             return node_detail[8]
         else:
             return None
@@ -37,53 +41,81 @@ async def load_cert_from_db(host):
     logger.warning(f"No certificate found in db.json for {host}")
     return None
 
-async def fetch_from_server(endpoint: str, method: str):
-    """Fetches data from the server using the specified endpoint and method."""
-    trusted_cert_pem = await load_cert_from_db(HOST)
-    print("trusted_cert_pem...", trusted_cert_pem)
-    if not trusted_cert_pem:
-        logger.error(f"No trusted certificate found for {HOST}")
-        return None
+def get_ssl_context(host, port, trusted_cert_pem):
+    """Returns a cached SSL context pinned to the given certificate."""
+    fingerprint = hashlib.sha256(trusted_cert_pem.encode()).hexdigest()
+    key = (host, port, fingerprint)
+    ssl_context = _ssl_contexts.get(key)
+    if ssl_context is not None:
+        return ssl_context
 
-    ssl_context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+    cert = x509.load_pem_x509_certificate(trusted_cert_pem.encode())
+    cert_der = cert.public_bytes(serialization.Encoding.DER)
+
+    # Trusts the pinned certificate only, loading the system CAs would cost memory per context and weaken the pin
+    ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
     ssl_context.check_hostname = False
     ssl_context.verify_mode = ssl.CERT_REQUIRED
+    ssl_context.load_verify_locations(cadata=cert_der)
+
+    _ssl_contexts[key] = ssl_context
+    return ssl_context
+
+def invalidate_pinned_certificate(host):
+    """Drops the cached certificate and SSL contexts of a host after its certificate changed."""
+    _pinned_certs.pop(host, None)
+    for key in [key for key in _ssl_contexts if key[0] == host]:
+        del _ssl_contexts[key]
+
+def get_pinned_session():
+    """Returns the long-lived session used for pinned requests."""
+    global _pinned_session
+    if _pinned_session is None or _pinned_session.closed:
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=4, keepalive_timeout=60)
+        _pinned_session = aiohttp.ClientSession(connector=connector)
+    return _pinned_session
+
+async def close_pinned_session():
+    """Closes the pinned session."""
+    global _pinned_session
+    if _pinned_session is not None and not _pinned_session.closed:
+        await _pinned_session.close()
+    _pinned_session = None
+
+async def fetch_from_server(host: str, port: int, endpoint: str, method: str):
+    """Fetches data from the server using the specified endpoint and method."""
+    trusted_cert_pem = await load_cert_from_db(host)
+    if not trusted_cert_pem:
+        logger.error(f"No trusted certificate found for {host}")
+        return None
 
     try:
-        cert = x509.load_pem_x509_certificate(trusted_cert_pem.encode())
-        cert_der = cert.public_bytes(serialization.Encoding.DER)
-        ssl_context.load_verify_locations(cadata=cert_der)
+        ssl_context = get_ssl_context(host, port, trusted_cert_pem)
     except Exception as e:
         logger.error(f"Error loading certificate: {e}")
         return None
 
-    url = f"https://{HOST}:{PORT}{endpoint}"
-    headers = {"Host": HOST}
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.request(method, url, ssl=ssl_context, headers=headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    logger.error(f"Request failed with status code: {response.status}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error during request: {e}")
-            return None
+    url = f"https://{host}:{port}{endpoint}"
+    headers = {"Host": host}
+
+    session = get_pinned_session()
+    try:
+        async with session.request(method, url, ssl=ssl_context, headers=headers) as response:
+            if response.status == 200:
+                return await response.json()
+            else:
+                logger.error(f"Request failed with status code: {response.status}")
+                return None
+    except Exception as e:
+        logger.error(f"Error during request: {e}")
+        return None
 
 # @app.get("/fetch_token_usage/")
 async def api_fetch_token_usage(host: str, port: int):
     """API endpoint to fetch token usage data."""
-    global HOST
-    global PORT
-    
-    HOST = host
-    PORT = port
-    logger.info(f"::HOST:: {HOST}")
-    logger.info(f"::PORT:: {PORT}")
-    result = await fetch_from_server("/fetch_token_usage/", "GET")
+    logger.debug("::HOST:: %s ::PORT:: %s", host, port)
+    result = await fetch_from_server(host, port, "/fetch_token_usage/", "GET")
     if result:
         return result
     else:
-        raise HTTPException(status_code=500, detail="Failed to fetch token usage data")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to fetch token usage data")
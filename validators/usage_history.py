@@ -0,0 +1,106 @@
+import time
+
+import numpy as np
+
+# Providers and per-provider counters kept from a node's usage_summary, anything else is dropped
+USAGE_PROVIDERS = ('openai', 'groq', 'claude', 'gemini')
+USAGE_FIELDS = (
+    'total_tokens_last_24_hours',
+    'total_tokens_last_12_hours',
+    'total_requests_last_24_hours',
+    'zero_value_entries_last_24_hours',
+)
+
+
+def compact_usage(usage_summary):
+    """Converts a usage_summary dict into a (providers, fields) int64 array, missing values read as 0."""
+    usage = np.zeros((len(USAGE_PROVIDERS), len(USAGE_FIELDS)), dtype=np.int64)
+    for row, provider in enumerate(USAGE_PROVIDERS):
+        counters = usage_summary.get(provider) or {}
+        for column, field in enumerate(USAGE_FIELDS):
+            usage[row, column] = int(counters.get(field) or 0)
+    return usage
+
+
+def expand_usage(usage):
+    """Inverse of compact_usage."""
+    return {
+        provider: {field: int(usage[row, column]) for column, field in enumerate(USAGE_FIELDS)}
+        for row, provider in enumerate(USAGE_PROVIDERS)
+    }
+
+
+class NodeUsageRing:
+    """The last depth usage samples of one node in preallocated arrays."""
+
+    __slots__ = ('hotkey', 'usage', 'recorded_at', 'next', 'count')
+
+    def __init__(self, depth):
+        self.hotkey = None
+        self.usage = np.zeros((depth, len(USAGE_PROVIDERS), len(USAGE_FIELDS)), dtype=np.int64)
+        self.recorded_at = np.zeros(depth)
+        self.next = 0
+        self.count = 0
+
+    def append(self, hotkey, usage, timestamp):
+        self.hotkey = hotkey
+        self.usage[self.next] = usage
+        self.recorded_at[self.next] = timestamp
+        self.next = (self.next + 1) % len(self.usage)
+        self.count = min(self.count + 1, len(self.usage))
+
+    def positions(self):
+        """Ring positions holding samples, oldest first."""
+        depth = len(self.usage)
+        return [(self.next - self.count + offset) % depth for offset in range(self.count)]
+
+    def latest(self):
+        if not self.count:
+            return None
+        return self.usage[(self.next - 1) % len(self.usage)]
+
+
+class UsageHistory:
+    """Keeps the last depth usage samples of every node, keyed by (miner_id, ip)."""
+
+    def __init__(self, depth=24):
+        self.depth = max(1, depth)
+        self._nodes = {}
+
+    def record(self, miner_id, ip, hotkey, usage_summary, timestamp=None):
+        self.record_compact(miner_id, ip, hotkey, compact_usage(usage_summary), timestamp)
+
+    def record_compact(self, miner_id, ip, hotkey, usage, timestamp=None):
+        """Same as record() with the usage already converted by compact_usage."""
+        ring = self._nodes.get((miner_id, ip))
+        if ring is None:
+            ring = self._nodes[(miner_id, ip)] = NodeUsageRing(self.depth)
+        ring.append(hotkey, usage, time.time() if timestamp is None else timestamp)
+
+    def forget(self, miner_ids):
+        """Drops the history of every node of the given miners."""
+        miner_ids = set(miner_ids)
+        for key in [key for key in self._nodes if key[0] in miner_ids]:
+            del self._nodes[key]
+
+    def latest(self, miner_id, ip):
+        """Returns the newest (providers, fields) usage array of a node, or None."""
+        ring = self._nodes.get((miner_id, ip))
+        return None if ring is None else ring.latest()
+
+    def to_dict(self):
+        """Expands the history into {miner_id: {"node_details": [...]}}, one entry per sample, oldest first."""
+        result = {}
+        for (miner_id, ip), ring in self._nodes.items():
+            node_details = result.setdefault(miner_id, {"node_details": []})["node_details"]
+            for position in ring.positions():
+                node_details.append({
+                    "node_ip": ip,
+                    "hotkey": ring.hotkey,
+                    "recorded_at": float(ring.recorded_at[position]),
+                    "usage_summary": expand_usage(ring.usage[position]),
+                })
+        return result
+
+    def __len__(self):
+        return len(self._nodes)
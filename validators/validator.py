@@ -13,6 +13,11 @@ from aiohttp.web_response import Response
 import bittensor as bt
 
 from validators.base_validator import BaseValidator, Validator, logger
+from validators.log_setup import setup_logging
+from validators import metrics
+from validators.scheduler import CycleScheduler
+from validators.sharding import ShardCoordinator
+from ssl_pinning_client import close_pinned_session
 from sqLite import *
 from envparse import env
 
@@ -20,6 +25,7 @@ from envparse import env
 create_node_detail_table()
 
 group_chat_vali = None
+cycle_scheduler = None
 metagraph = None
 
 def get_config() -> bt.config:
@@ -27,6 +33,38 @@ def get_config() -> bt.config:
     parser = argparse.ArgumentParser()
     parser.add_argument("--netuid", type=int, default=77)
     parser.add_argument('--http_port', type=int, default=8090)
+    parser.add_argument('--discovery_concurrency', type=int, default=64, help="Maximum GetNodeDetail queries in flight during discovery.")
+    parser.add_argument('--discovery_retries', type=int, default=1, help="Retry rounds for miners that failed discovery.")
+    parser.add_argument('--discovery_sweep_seconds', type=float, default=3600, help="Seconds a miner's discovered node list is reused before it is discovered again.")
+    parser.add_argument('--cycle_period', type=float, default=15 * 60, help="Seconds between the starts of two validation cycles.")
+    parser.add_argument('--cycle_jitter', type=float, default=0.1, help="Random delay added to each period, as a fraction of it.")
+    parser.add_argument('--cycle_deadline', type=float, default=0, help="Seconds a cycle may run before it is cancelled, 0 for no limit.")
+    parser.add_argument('--cycle_overrun', type=str, default='shorten', choices=['shorten', 'skip'], help="Start the next cycle at once or skip the missed slots when a cycle overruns.")
+    parser.add_argument('--metagraph_refresh_blocks', type=int, default=100, help="Resync the metagraph after this many blocks.")
+    parser.add_argument('--metagraph_refresh_seconds', type=float, default=20 * 60, help="Resync the metagraph after this many seconds.")
+    parser.add_argument('--verifier_url', type=str, default="http://localhost:8080", help="Base URL of the attestation verifier.")
+    parser.add_argument('--score_workers', type=int, default=20, help="Concurrent workers fetching node usage.")
+    parser.add_argument('--node_timeout', type=float, default=30, help="Seconds allowed to fetch the usage of one node.")
+    parser.add_argument('--request_attempt_timeout', type=float, default=10, help="Seconds one request to a node may take, retries share --node_timeout.")
+    parser.add_argument('--request_attempts', type=int, default=3, help="Attempts per request to a node, as long as --node_timeout allows.")
+    parser.add_argument('--request_backoff', type=float, default=1, help="Base of the jittered exponential backoff between attempts, in seconds.")
+    parser.add_argument('--hedge_quantile', type=float, default=0.95, help="Latency quantile after which a second request is sent to a slow node, 0 to disable.")
+    parser.add_argument('--node_backoff_base', type=float, default=600, help="Seconds a node is skipped after its first failure, doubled with every further failure.")
+    parser.add_argument('--node_backoff_max', type=float, default=6 * 3600, help="Longest time a failing node is skipped.")
+    parser.add_argument('--score_broadcast_timeout', type=float, default=5, help="Seconds the end of cycle score broadcast waits for miners.")
+    parser.add_argument('--notification_concurrency', type=int, default=8, help="Failure notifications delivered to miners at the same time.")
+    parser.add_argument('--weights_min_interval', type=float, default=300, help="Minimum seconds between two set_weights extrinsics.")
+    parser.add_argument('--weights_refresh_interval', type=float, default=3600, help="Seconds after which unchanged weights are committed again.")
+    parser.add_argument('--measurement_path', type=str, default='attestation/measurement.json', help="Expected measurement used by the verifier, cached verdicts are dropped when it changes.")
+    parser.add_argument('--verdict_ttl', type=float, default=3600, help="Seconds a successful attestation verdict is reused for an unchanged report.")
+    parser.add_argument('--verdict_cache_size', type=int, default=10000, help="Maximum number of cached attestation verdicts.")
+    parser.add_argument('--verifier_db_path', type=str, default=None, help="Path of the db.json written by the attestation verifier.")
+    parser.add_argument('--usage_history_depth', type=int, default=24, help="Usage samples kept per node for /get-node-usage.")
+    parser.add_argument('--log_level', type=str, default=None, help="Level of the validator logs (DEBUG, INFO, ...), defaults to DAASI_LOG_LEVEL or INFO.")
+    parser.add_argument('--shards', type=int, default=0, help="Worker processes running discovery, attestation and usage fetch, 0 or 1 to run everything in this process.")
+    parser.add_argument('--verifier_batch_size', type=int, default=32, help="Number of attestation reports sent to the verifier per batch request.")
+    parser.add_argument('--verifier_batch_timeout', type=float, default=120, help="Seconds the verifier may take to answer one batch request.")
+    parser.add_argument('--verifier_batch_concurrency', type=int, default=4, help="Batch requests in flight to the verifier at once.")
     bt.subtensor.add_args(parser)
     bt.logging.add_args(parser)
     bt.wallet.add_args(parser)
@@ -101,7 +139,7 @@ async def get_node_detail(request: web.Request) -> Response:
     """Endpoint to fetch node details and calculate score."""
     try:
         logger.info("Request made to fetch node details and calculate score per miner")
-        res = await group_chat_vali.get_nodes_ip_and_status()
+        res = await cycle_scheduler.run_cycle('http')
         return web.json_response(res)
     except Exception as e:
         logger.error(f"Error in get_node_detail: {e}")
@@ -167,7 +205,25 @@ class ValidatorApplication:
         for route in routes:
             self.app.router.add_route(*route)
 
+async def get_metrics(request: web.Request) -> Response:
+    """Endpoint serving the validator metrics in the Prometheus text format."""
+    return web.Response(text=metrics.render(), headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
 validator_app = ValidatorApplication()
+validator_app.add_routes([('GET', '/metrics', get_metrics)])
+
+async def close_validator_sessions(app: web.Application) -> None:
+    """Closes the pooled HTTP sessions held by the validator."""
+    if group_chat_vali is not None:
+        if group_chat_vali.score_broadcast is not None:
+            group_chat_vali.score_broadcast.cancel()
+        await group_chat_vali.notifications.close()
+        if group_chat_vali.shard_coordinator is not None:
+            await asyncio.get_running_loop().run_in_executor(None, group_chat_vali.shard_coordinator.close)
+        await group_chat_vali.attestation_client.close()
+    await close_pinned_session()
+
+validator_app.app.on_cleanup.append(close_validator_sessions)
 
 # validator_app.add_routes([
 #     ('GET', '/calculate_score', calculate_score),
@@ -177,29 +233,41 @@ validator_app = ValidatorApplication()
 #     ('GET', '/get-node-usage', get_node_list_system_usage),
 # ])
 
+def initialize_scheduler(config: bt.config):
+    """Creates the scheduler that owns the validation cycle."""
+    global cycle_scheduler
+    if group_chat_vali is None:
+        logger.error("Validator is not initialized, the validation cycle will not be scheduled")
+        return
+    cycle_scheduler = CycleScheduler(
+        group_chat_vali.get_nodes_ip_and_status,
+        period=config.cycle_period,
+        jitter=config.cycle_jitter,
+        deadline=config.cycle_deadline or None,
+        overrun_policy=config.cycle_overrun,
+    )
+
 async def schedule_get_node_detail():
-    """Function to schedule get_node_detail every 15 minutes."""
-    while True:
-        try:
-            logger.info("Scheduled task: Fetching node details.")
-            res = await group_chat_vali.get_nodes_ip_and_status()  # Assuming this is the method you want to call.
-            logger.info(f"Node details fetched: {res}")
-        except Exception as e:
-            logger.error(f"Error in scheduled get_node_detail task: {e}")
-        await asyncio.sleep(1/2 * 60)  # Sleep for 15 minutes (15 * 60 seconds)
+    """Runs the validation cycle every cycle_period seconds."""
+    if cycle_scheduler is None:
+        return
+    logger.info("Scheduled task: Fetching node details.")
+    await cycle_scheduler.run_forever()
 
 
 
 def main(run_aio_app=True, test=False) -> None:
     """Main function to run the validator application."""
     config = get_config()
+    setup_logging(config.log_level)
     wallet, subtensor, dendrite, my_uid = initialize_components(config)
     logger.info(f"my_uid: {my_uid}")
     validator_config_global = {
         "dendrite": dendrite,
         "config": config,
         "subtensor": subtensor,
-        "wallet": wallet
+        "wallet": wallet,
+        "metagraph": metagraph
     }
     logger.info(f"::Dendrite Info :: {validator_config_global['dendrite']}")
     logger.info(f"::Config :: {validator_config_global['config']}")
@@ -207,11 +275,16 @@ def main(run_aio_app=True, test=False) -> None:
     logger.info(f"::Wallet Info :: {validator_config_global['wallet']}")
 
     initialize_validators(validator_config_global, test)
+    if config.shards > 1 and group_chat_vali is not None:
+        group_chat_vali.shard_coordinator = ShardCoordinator(group_chat_vali, config.shards)
+        group_chat_vali.shard_coordinator.start()
+        logger.info(f"Per-node stages run in {config.shards} shard worker processes")
+    initialize_scheduler(config)
     logger.info("✅ Initialization of all validators has been completed.")
     
     loop = asyncio.get_event_loop()
 
-    # Schedule the task to run every 15 minutes
+    # Schedule the validation cycle
     loop.create_task(schedule_get_node_detail())
 
     if run_aio_app:
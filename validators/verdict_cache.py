@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger('colorful_logger')
+
+
+def report_digest(ip_res):
+    """sha256 of an attestation payload (report, certificate and miner ip) in canonical JSON form."""
+    payload = json.dumps(ip_res, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class VerdictCache:
+    """LRU cache of successful verifier verdicts keyed by (node ip, report_digest).
+
+    Entries expire after ttl seconds and the whole cache is dropped when the expected
+    measurement in measurement_path changes, since old verdicts were checked against it.
+    """
+
+    def __init__(self, measurement_path=None, ttl=3600, max_size=10000):
+        self.measurement_path = measurement_path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._measurement_mtime = None
+        self._measurement_digest = None
+        self._check_measurement()
+
+    def _check_measurement(self):
+        if not self.measurement_path:
+            return
+        try:
+            mtime = os.stat(self.measurement_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._measurement_mtime:
+            return
+        self._measurement_mtime = mtime
+        digest = None
+        if mtime is not None:
+            with open(self.measurement_path, 'rb') as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+        if digest != self._measurement_digest:
+            if self._entries:
+                logger.info(f"Expected measurement changed, dropping {len(self._entries)} cached verdicts")
+            self._entries.clear()
+            self._measurement_digest = digest
+
+    def get(self, key):
+        """Returns the cached verdict for an (ip, report_digest) key, or None when missing or expired."""
+        self._check_measurement()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, verdict):
+        self._entries[key] = (time.monotonic() + self.ttl, verdict)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drops one verdict, or all of them when key is None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)